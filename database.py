@@ -7,9 +7,11 @@ from typing import List, Dict, Any
 from db_config import (
     get_db_type, 
     get_pooled_connection, 
+    get_readonly_connection,
     release_connection, 
     adapt_query,
-    get_placeholder
+    get_placeholder,
+    execute_many
 )
 
 class DatabaseManager:
@@ -20,6 +22,7 @@ class DatabaseManager:
     
     def __init__(self):
         self.conn = None
+        self.ro_conn = None
         self.db_type = get_db_type()
         print(f"[DatabaseManager] Using {self.db_type.upper()}")
 
@@ -27,6 +30,12 @@ class DatabaseManager:
         """Get a database connection (pooled for PostgreSQL)"""
         return get_pooled_connection()
 
+    def get_readonly_connection(self):
+        """Lazily open the read-only connection kept apart from the writers"""
+        if self.ro_conn is None:
+            self.ro_conn = get_readonly_connection()
+        return self.ro_conn
+
     def _release(self, conn):
         """Release connection back to pool"""
         release_connection(conn)
@@ -136,9 +145,11 @@ class DatabaseManager:
             ph = get_placeholder()
             query = f"INSERT INTO ticker_history (timestamp, symbol, price, change_pct, volume) VALUES ({ph}, {ph}, {ph}, {ph}, {ph})"
             
-            for p in prices:
-                ts = p['timestamp'] if self.db_type == 'postgresql' else p['timestamp'].isoformat()
-                cursor.execute(query, (ts, p['symbol'], p['price'], p['change'], p['volume']))
+            execute_many(cursor, query, [
+                (p['timestamp'] if self.db_type == 'postgresql' else p['timestamp'].isoformat(),
+                 p['symbol'], p['price'], p['change'], p['volume'])
+                for p in prices
+            ])
             
             conn.commit()
             self._release(conn)
@@ -162,6 +173,26 @@ class DatabaseManager:
         except Exception as e:
             print(f"[DB Error] Log Snapshot: {e}")
 
+    def log_snapshot_batch(self, snapshots: List[Dict[str, Any]]):
+        """Log batch of system state snapshots in one transaction"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            ph = get_placeholder()
+            query = f"INSERT INTO system_state (timestamp, state, risk_score, regime) VALUES ({ph}, {ph}, {ph}, {ph})"
+            
+            execute_many(cursor, query, [
+                (s['timestamp'] if self.db_type == 'postgresql' else s['timestamp'].isoformat(),
+                 s['state'], s['risk'], s['regime'])
+                for s in snapshots
+            ])
+            
+            conn.commit()
+            self._release(conn)
+        except Exception as e:
+            print(f"[DB Error] Log Snapshots: {e}")
+
     def get_recent_events(self, limit: int = 50) -> List[Dict]:
         """Get recent market events"""
         try:
@@ -3,6 +3,7 @@ Database Configuration for Finance-X
 Supports both Neon PostgreSQL (production) and SQLite (local development)
 """
 import os
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,6 +12,7 @@ load_dotenv()
 # Database configuration
 DATABASE_URL = os.getenv('DATABASE_URL')
 USE_SQLITE = os.getenv('USE_SQLITE', 'false').lower() == 'true'
+SQLITE_PATH = 'finance.db'
 
 def get_db_type():
     """Determine which database to use"""
@@ -24,15 +26,46 @@ def get_connection():
     
     if db_type == 'sqlite':
         import sqlite3
-        return sqlite3.connect('finance.db', check_same_thread=False)
+        conn = sqlite3.connect(SQLITE_PATH, check_same_thread=False)
+        _tune_sqlite(conn)
+        return conn
     else:
         import psycopg2
         from psycopg2 import pool
         return psycopg2.connect(DATABASE_URL)
 
+def _tune_sqlite(conn):
+    """Per-connection PRAGMAs for the writer connections"""
+    if SQLITE_PATH != ':memory:':
+        # WAL appends to a log instead of copying pages to a rollback journal,
+        # and with synchronous=NORMAL only checkpoints fsync
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-20000')  # ~20 MB page cache
+    conn.execute('PRAGMA mmap_size=268435456')
+
+def get_readonly_connection(statement_timeout_ms=2000):
+    """Get a separate read-only connection (used for ad-hoc admin queries)"""
+    db_type = get_db_type()
+
+    if db_type == 'sqlite':
+        import sqlite3
+        return sqlite3.connect(f'file:{SQLITE_PATH}?mode=ro', uri=True, check_same_thread=False)
+    else:
+        import psycopg2
+        # Server-side guard; SQLite callers enforce the timeout with a progress handler
+        return psycopg2.connect(
+            DATABASE_URL,
+            options=f'-c default_transaction_read_only=on -c statement_timeout={statement_timeout_ms}'
+        )
+
 # Connection pool for PostgreSQL (handles 20K+ concurrent users)
 _connection_pool = None
 
+# Per-thread SQLite connection handed out by get_pooled_connection
+_sqlite_local = threading.local()
+
 def get_pool():
     """Get or create connection pool for PostgreSQL"""
     global _connection_pool
@@ -60,7 +93,15 @@ def get_pooled_connection():
     pool = get_pool()
     if pool:
         return pool.getconn()
-    return get_connection()
+    
+    # SQLite: one long-lived connection per thread instead of connect per call
+    conn = getattr(_sqlite_local, 'conn', None)
+    if conn is None:
+        conn = _sqlite_local.conn = get_connection()
+    elif conn.in_transaction:
+        # Left open by a caller that failed before commit; don't let the next caller commit it
+        conn.rollback()
+    return conn
 
 def release_connection(conn):
     """Release connection back to pool"""
@@ -68,7 +109,7 @@ def release_connection(conn):
     if pool:
         pool.putconn(conn)
     else:
-        # SQLite - just close
+        # SQLite - the connection stays open for reuse by this thread
         pass
 
 def close_pool():
@@ -79,6 +120,18 @@ def close_pool():
         _connection_pool = None
         print("[Database] Connection pool closed")
 
+def execute_many(cursor, query, rows):
+    """
+    executemany that batches round-trips on PostgreSQL.
+    psycopg2's own executemany sends one statement per row; execute_batch
+    packs page_size statements into each network round-trip.
+    """
+    if get_db_type() == 'postgresql':
+        from psycopg2.extras import execute_batch
+        execute_batch(cursor, query, rows, page_size=500)
+    else:
+        cursor.executemany(query, rows)
+
 # Utility function for parameterized queries
 def get_placeholder():
     """Get the correct placeholder for the database type"""
@@ -1,13 +1,30 @@
 import math
-import random
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
 from models import MarketEvent, ProcessedEvent, SystemState, MarketSnapshot, Ticker, PricePoint, MarketRegime
 
 import numpy as np
-from performance_engine import PerformanceEngine, HardwareNavigator
+from performance_engine import PerformanceEngine, HardwareNavigator, decayed_risk
 
 class TechnicalAnalysis:
+    # symbol -> (last PricePoint the bands were computed from, bands)
+    _bands_cache: Dict[str, Tuple[PricePoint, Tuple[List[float], List[float], List[float]]]] = {}
+
+    @staticmethod
+    def bands_for(ticker: Ticker) -> Tuple[List[float], List[float], List[float]]:
+        """
+        Bollinger bands for a ticker's history, recomputed only when a new point
+        has been appended. The cached entry holds the last point itself, so an
+        identity check is enough even once the history window is full.
+        """
+        last = ticker.history[-1] if ticker.history else None
+        entry = TechnicalAnalysis._bands_cache.get(ticker.symbol)
+        if entry is not None and entry[0] is last:
+            return entry[1]
+        bands = TechnicalAnalysis.calculate_bollinger_bands(ticker.history)
+        TechnicalAnalysis._bands_cache[ticker.symbol] = (last, bands)
+        return bands
+
     @staticmethod
     def calculate_bollinger_bands(history: List[PricePoint], window: int = 20, num_std: float = 2.0) -> Tuple[List[float], List[float], List[float]]:
         """Returns (Upper Band, Middle Band, Lower Band)"""
@@ -32,7 +49,7 @@ class TechnicalAnalysis:
         if len(ticker.history) < 20:
              return {"depth": "LOW", "advice": "INSUFFICIENT DATA", "bid": 0.0}
 
-        u, m, l = TechnicalAnalysis.calculate_bollinger_bands(ticker.history)
+        u, m, l = TechnicalAnalysis.bands_for(ticker)
         current_price = ticker.current_price
         upper_curr = u[-1]
         lower_curr = l[-1]
@@ -99,14 +116,15 @@ class MarketSimulator:
         # Vectorized Update
         new_prices = PerformanceEngine.batch_update_prices(current_prices, vols, system_risk)
         
+        # Simple volume sim, drawn for all tickers at once
+        multiplier = 4.0 if system_risk > 25.0 else 1.0
+        volumes = (np.random.uniform(1000, 5000, len(tickers_list)) * multiplier).astype(int).tolist()
+        
         # Update Objects
         for i, t in enumerate(tickers_list):
             old_p = t.current_price
             t.current_price = float(new_prices[i])
-            
-            # Simple volume sim
-            multiplier = 4.0 if system_risk > 25.0 else 1.0
-            volume = int(random.uniform(1000, 5000) * multiplier)
+            volume = volumes[i]
             
             t.history.append(PricePoint(current_time, t.current_price, volume))
             if len(t.history) > 100:
@@ -121,6 +139,12 @@ from database import DatabaseManager
 class IntelligenceEngine:
     def __init__(self, decay_rate: float = 0.1):
         self.events: List[ProcessedEvent] = []
+        # Column-wise view of self.events (same order) for fast response building
+        self.weights = np.empty(0)
+        self.base_impacts = np.empty(0)
+        self.event_ts = np.empty(0)  # epoch seconds of each event
+        self.times_str: List[str] = []
+        self.descs: List[str] = []
         self.decay_rate = decay_rate
         self.current_state = SystemState.STABLE
         self.current_regime = MarketRegime.LOW_VOL
@@ -137,6 +161,11 @@ class IntelligenceEngine:
             relevance_score=relevance
         )
         self.events.append(processed)
+        self.weights = np.append(self.weights, relevance)
+        self.base_impacts = np.append(self.base_impacts, event.base_impact)
+        self.event_ts = np.append(self.event_ts, event.timestamp.timestamp())
+        self.times_str.append(event.time_hm)
+        self.descs.append(event.description)
         print(f"[{event.timestamp.strftime('%H:%M:%S')}] Ingested: {event.description} (Impact: {event.base_impact})")
         
         # Log to DB
@@ -146,29 +175,27 @@ class IntelligenceEngine:
         if not self.events:
             return
 
-        # Vectorized Decay
-        current_ts = current_time.timestamp()
-        
-        # Extract arrays
-        weights = np.array([e.relevance_score for e in self.events])
-        timestamps = np.array([e.original_event.timestamp.timestamp() for e in self.events])
-        
-        # Batch Calculate
-        new_weights = PerformanceEngine.calculate_decay_batch(weights, timestamps, current_ts, self.decay_rate)
+        # Vectorized Decay straight from the columns (relevance == base impact)
+        new_weights = PerformanceEngine.calculate_decay_batch(
+            self.base_impacts, self.event_ts, current_time.timestamp(), self.decay_rate)
         
         # Update and Filter (Python loop needed for object update, but math is done)
         active_rec = []
-        for i, event in enumerate(self.events):
-            w = float(new_weights[i])
+        for event, w in zip(self.events, new_weights.tolist()):
             event.current_weight = w
             if w > 0.5:
                 active_rec.append(event)
         
         self.events = active_rec
-
-    def detect_state(self, current_time: datetime) -> MarketSnapshot:
-        total_risk = sum(e.current_weight for e in self.events)
         
+        keep = new_weights > 0.5
+        self.weights = new_weights[keep]
+        self.base_impacts = self.base_impacts[keep]
+        self.event_ts = self.event_ts[keep]
+        self.times_str = [t for t, k in zip(self.times_str, keep) if k]
+        self.descs = [d for d, k in zip(self.descs, keep) if k]
+
+    def _update_state(self, total_risk: float):
         if total_risk > 25.0:
             self.current_state = SystemState.CRASH
             self.current_regime = MarketRegime.HIGH_VOL
@@ -178,17 +205,13 @@ class IntelligenceEngine:
         elif total_risk < 5.0:
             self.current_state = SystemState.STABLE
             self.current_regime = MarketRegime.LOW_VOL
-            
-        self.simulator.update_prices(current_time, total_risk)
 
-        top_events = sorted(self.events, key=lambda x: x.current_weight, reverse=True)[:5]
-        
-        # Log State Snapshot
+    def _snapshot_row(self, current_time: datetime, total_risk: float) -> Dict:
         state_val = self.current_state.value if hasattr(self.current_state, 'value') else str(self.current_state)
         regime_val = self.current_regime.value if hasattr(self.current_regime, 'value') else str(self.current_regime)
-        self.db.log_snapshot(current_time, state_val, total_risk, regime_val)
-        
-        # Log Prices
+        return {"timestamp": current_time, "state": state_val, "risk": total_risk, "regime": regime_val}
+
+    def _price_rows(self, current_time: datetime) -> List[Dict]:
         price_batch = []
         for t in self.simulator.tickers.values():
              if t.history:
@@ -200,7 +223,23 @@ class IntelligenceEngine:
                      "change": t.change_pct,
                      "volume": last_pt.volume
                  })
-        self.db.log_price_batch(price_batch)
+        return price_batch
+
+    def detect_state(self, current_time: datetime) -> MarketSnapshot:
+        # weights mirrors each event's current_weight
+        total_risk = float(self.weights.sum())
+        
+        self._update_state(total_risk)
+        self.simulator.update_prices(current_time, total_risk)
+
+        top_events = sorted(self.events, key=lambda x: x.current_weight, reverse=True)[:5]
+        
+        # Log State Snapshot
+        snap = self._snapshot_row(current_time, total_risk)
+        self.db.log_snapshot(current_time, snap["state"], total_risk, snap["regime"])
+        
+        # Log Prices
+        self.db.log_price_batch(self._price_rows(current_time))
         
         return MarketSnapshot(
             timestamp=current_time,
@@ -209,9 +248,47 @@ class IntelligenceEngine:
             active_events=top_events,
             regime=self.current_regime
         )
+
+    def preroll(self, start_time: datetime, ticks: int, step: timedelta = timedelta(minutes=15)) -> datetime:
+        """
+        Batched equivalent of `ticks` rounds of apply_decay + detect_state.
+        Risk for every tick is computed in one vectorized pass and the
+        DB logs are written in two transactions. Returns the final time.
+        """
+        if ticks <= 0:
+            return start_time
+        times = [start_time + step * (k + 1) for k in range(ticks)]
+        if self.events:
+            # Decay is monotonic, so thresholding per tick matches apply_decay
+            # dropping an event once it falls below 0.5
+            risks = [decayed_risk(self.base_impacts, self.event_ts, t.timestamp(), self.decay_rate)
+                     for t in times]
+        else:
+            risks = [0.0] * ticks
+
+        snapshots, prices = [], []
+        for current_time, total_risk in zip(times, risks):
+            self._update_state(total_risk)
+            self.simulator.update_prices(current_time, total_risk)
+            snapshots.append(self._snapshot_row(current_time, total_risk))
+            prices.extend(self._price_rows(current_time))
+
+        self.apply_decay(times[-1])
+        self.db.log_snapshot_batch(snapshots)
+        self.db.log_price_batch(prices)
+        return times[-1]
             
+    @property
+    def tickers(self) -> Dict[str, Ticker]:
+        return self.simulator.tickers
+
     def get_ticker(self, symbol: str) -> Ticker:
         return self.simulator.tickers.get(symbol)
+
+    def get_tickers(self, symbols) -> List[Ticker]:
+        """Tickers for `symbols` in the given order, skipping unknown symbols."""
+        tickers = self.simulator.tickers
+        return [tickers[s] for s in symbols if s in tickers]
     
     def get_all_tickers(self) -> List[Dict]:
         return [
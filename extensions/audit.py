@@ -3,13 +3,16 @@ Audit & Compliance Layer
 MiFID II / SOX compliant logging for regulatory requirements
 """
 
+import atexit
 import json
+import queue
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
 
 # Import persistence
-from extensions.persistence import get_db
+from extensions.persistence import get_db, audit_json
 
 
 class AuditLogger:
@@ -18,10 +21,74 @@ class AuditLogger:
     Regulatory compliance: MiFID II (EU), SOX (US), Dodd-Frank
     """
     
+    BATCH_SIZE = 100
+    
     def __init__(self):
         self.db = get_db()
+        # Entries the database still rejects after a retry are appended here
+        self.dead_letter_path = Path(self.db.db_path).with_name("audit_dead_letter.jsonl")
+        # Commands are queued and written in batches by a background thread,
+        # keeping SQLite commits off the request path
+        self._queue = queue.Queue(maxsize=10000)
+        self._writer = threading.Thread(target=self._drain, name="audit-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
         print("[Audit] Compliance logging enabled")
     
+    def _drain(self):
+        """Background writer: block for one entry, then take whatever else is queued"""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def _write(self, batch: List[tuple]):
+        """Write a batch; if it fails, retry entry by entry and dead-letter what still fails"""
+        try:
+            self.db.log_command_batch(batch)
+            return
+        except Exception as e:
+            print(f"[Audit] Batch write error ({len(batch)} entries), retrying singly: {e}")
+        for entry in batch:
+            try:
+                self.db.log_command_batch([entry])
+            except Exception as e:
+                self._dead_letter(entry, e)
+    
+    def _dead_letter(self, entry: tuple, error: Exception):
+        """Keep an unwritable entry on disk instead of discarding it"""
+        timestamp, user, command, inputs, outputs = entry
+        record = {
+            "timestamp": timestamp.isoformat(),
+            "user": user,
+            "command": command,
+            "inputs": inputs,
+            "outputs": outputs,
+            "error": str(error)
+        }
+        try:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            print(f"[Audit] Write error, entry kept in {self.dead_letter_path}: {error}")
+        except OSError as e:
+            print(f"[Audit] Write error, entry LOST ({command!r}): {error}; dead-letter failed: {e}")
+    
+    def flush(self):
+        """Block until every queued entry has been written"""
+        self._queue.join()
+    
+    def _records(self, start: datetime, end: datetime) -> List[Dict]:
+        self.flush()
+        return self.db.export_audit_trail(start, end)
+    
     def log_command(
         self, 
         command: str, 
@@ -33,12 +100,14 @@ class AuditLogger:
         Log every terminal command for audit trail.
         MiFID II Article 17: All algo trading decisions must be logged.
         """
-        self.db.log_command(
-            command=command,
-            inputs=inputs or {},
-            outputs=outputs or {},
-            user=user
-        )
+        # Serialized now: the writer runs after the request has returned, and
+        # outputs is often a response dict the caller may still mutate
+        entry = (datetime.now(), user, command, audit_json(inputs), audit_json(outputs))
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Never drop audit records: write synchronously when the writer falls behind
+            self._write([entry])
     
     def log_decision(
         self,
@@ -59,7 +128,7 @@ class AuditLogger:
             "timestamp": datetime.now().isoformat()
         }
         
-        self.db.log_command(
+        self.log_command(
             command=f"MODEL_DECISION:{model_name}",
             inputs=inputs,
             outputs=outputs,
@@ -76,7 +145,7 @@ class AuditLogger:
         Export audit trail for regulatory reporting.
         Supports JSON, CSV formats.
         """
-        records = self.db.export_audit_trail(start, end)
+        records = self._records(start, end)
         
         if format == "csv":
             # Convert to CSV-friendly format
@@ -98,7 +167,7 @@ class AuditLogger:
         end = datetime.now()
         start = end - timedelta(hours=hours)
         
-        all_records = self.db.export_audit_trail(start, end)
+        all_records = self._records(start, end)
         return [r for r in all_records if r['user'] == user]
     
     def detect_anomalies(self) -> List[Dict]:
@@ -111,7 +180,7 @@ class AuditLogger:
         # Check last hour
         end = datetime.now()
         start = end - timedelta(hours=1)
-        records = self.db.export_audit_trail(start, end)
+        records = self._records(start, end)
         
         anomalies = []
         
@@ -141,7 +210,7 @@ class AuditLogger:
         Full compliance report for auditors.
         Includes: command count, user activity, model decisions, anomalies
         """
-        records = self.db.export_audit_trail(start, end)
+        records = self._records(start, end)
         
         # Aggregate statistics
         total_commands = len(records)
@@ -149,7 +218,8 @@ class AuditLogger:
         
         command_types = {}
         for r in records:
-            cmd = r['command'].split()[0] if r['command'] else 'UNKNOWN'
+            # Only the verb is needed; don't tokenize the whole command (e.g. long SQL text)
+            cmd = (r['command'].split(None, 1) or ['UNKNOWN'])[0] if r['command'] else 'UNKNOWN'
             command_types[cmd] = command_types.get(cmd, 0) + 1
         
         model_decisions = [r for r in records if 'MODEL_DECISION' in r['command']]
@@ -5,6 +5,7 @@ Provides SQLite storage for price history and audit trails
 
 import sqlite3
 import json
+import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from pathlib import Path
@@ -15,6 +16,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from models import PricePoint, ProcessedEvent, MarketEvent
 
 
+def audit_json(payload: Optional[Dict]) -> Optional[str]:
+    """Serialize audit inputs/outputs; values JSON can't encode are stored as str()"""
+    return json.dumps(payload, default=str) if payload else None
+
+
 class PersistenceEngine:
     """
     Time-series database for market data and audit trails.
@@ -25,6 +31,12 @@ class PersistenceEngine:
         self.db_path = db_path
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Audit writes come from the background writer (and request threads when
+        # its queue is full); they get their own connection and lock so a commit
+        # can never pick up another thread's half-built transaction on self.conn
+        self._audit_conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._audit_lock = threading.Lock()
+        self._last_stored: Dict[str, datetime] = {}  # newest stored tick per ticker (this process)
         self._create_schema()
         
     def _create_schema(self):
@@ -90,15 +102,20 @@ class PersistenceEngine:
         self.conn.commit()
     
     def store_price_batch(self, ticker: str, points: List[PricePoint]):
-        """Bulk insert for efficiency"""
+        """Bulk insert for efficiency; ticks already stored for this ticker are skipped"""
+        last = self._last_stored.get(ticker)
+        data = [(ticker, p.timestamp, p.price, p.volume) for p in points
+                if last is None or p.timestamp > last]
+        if not data:
+            return
         cursor = self.conn.cursor()
-        data = [(ticker, p.timestamp, p.price, p.volume) for p in points]
         cursor.executemany("""
             INSERT INTO price_history (ticker, timestamp, price, volume)
             VALUES (?, ?, ?, ?)
         """, data)
         self.conn.commit()
-        print(f"[Persistence] Stored {len(points)} ticks for {ticker}")
+        self._last_stored[ticker] = max(row[1] for row in data)
+        print(f"[Persistence] Stored {len(data)} ticks for {ticker}")
     
     def query_history(self, ticker: str, hours: int = 24) -> List[PricePoint]:
         """Retrieve historical data"""
@@ -161,18 +178,24 @@ class PersistenceEngine:
     
     def log_command(self, command: str, inputs: Dict = None, outputs: Dict = None, user: str = "terminal"):
         """Compliance logging - every command tracked"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO audit_log (timestamp, user, command, inputs, outputs)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            datetime.now(),
-            user,
-            command,
-            json.dumps(inputs) if inputs else None,
-            json.dumps(outputs) if outputs else None
-        ))
-        self.conn.commit()
+        self.log_command_batch([(datetime.now(), user, command, audit_json(inputs), audit_json(outputs))])
+    
+    def log_command_batch(self, entries: List[tuple]):
+        """
+        Write (timestamp, user, command, inputs_json, outputs_json) audit entries in one
+        transaction. Payloads arrive already serialized (audit_json); on failure the
+        batch is rolled back and the error re-raised.
+        """
+        with self._audit_lock:
+            try:
+                self._audit_conn.executemany("""
+                    INSERT INTO audit_log (timestamp, user, command, inputs, outputs)
+                    VALUES (?, ?, ?, ?, ?)
+                """, entries)
+                self._audit_conn.commit()
+            except Exception:
+                self._audit_conn.rollback()
+                raise
     
     def export_audit_trail(self, start: datetime, end: datetime) -> List[Dict]:
         """Export audit log for compliance reporting"""
@@ -222,6 +245,8 @@ class PersistenceEngine:
     
     def close(self):
         """Clean shutdown"""
+        with self._audit_lock:
+            self._audit_conn.close()
         self.conn.close()
         print("[Persistence] Database connection closed")
 
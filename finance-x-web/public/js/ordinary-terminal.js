@@ -136,10 +136,11 @@ function displayChart(response) {
     addOutput(`📊 CHART: ${response.symbol}`, 'output-success');
     addOutput('═'.repeat(80), 'output-line');
 
-    const history = response.history.slice(-10);
-    history.forEach(point => {
-        addOutput(`${point.t}: ₹${point.p.toFixed(2)} | Vol: ${point.v}`, 'output-line');
-    });
+    // history is sent as parallel arrays {t: [], p: [], v: []}
+    const { t, p, v } = response.history;
+    for (let i = Math.max(0, p.length - 10); i < p.length; i++) {
+        addOutput(`${t[i]}: ₹${p[i].toFixed(2)} | Vol: ${v[i]}`, 'output-line');
+    }
 
     addOutput('═'.repeat(80), 'output-line');
     addOutput(`Bollinger Bands: Upper=${response.bands.upper.toFixed(2)}, Mid=${response.bands.middle.toFixed(2)}, Lower=${response.bands.lower.toFixed(2)}`, 'output-line');
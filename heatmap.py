@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 def calculate_correlation_matrix(price_data: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate correlation matrix from price data.
+    Uses log returns and a single np.corrcoef call over the whole matrix.
     
     Args:
         price_data: DataFrame with symbols as columns and dates as index
@@ -19,8 +20,11 @@ def calculate_correlation_matrix(price_data: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Correlation matrix DataFrame
     """
-    returns = price_data.pct_change().dropna()
-    return returns.corr()
+    prices = price_data.to_numpy(dtype=float)
+    returns = np.log(prices[1:] / prices[:-1])
+    returns = returns[~np.isnan(returns).any(axis=1)]
+    corr = np.corrcoef(returns, rowvar=False)
+    return pd.DataFrame(corr, index=price_data.columns, columns=price_data.columns)
 
 
 def calculate_returns_heatmap(price_data: pd.DataFrame, period: str = 'daily') -> pd.DataFrame:
@@ -199,9 +203,12 @@ def time_series_heatmap(price_data: pd.DataFrame, window: int = 20) -> Dict:
     # Calculate daily returns
     returns = recent_data.pct_change().fillna(0) * 100  # Convert to percentage
     
+    # Format the date axis once and reuse it for every symbol
+    dates = returns.index.strftime('%Y-%m-%d').tolist()
+    
     heatmap = {
         'type': 'timeseries_heatmap',
-        'dates': [d.strftime('%Y-%m-%d') for d in returns.index],
+        'dates': dates,
         'symbols': list(returns.columns),
         'data': []
     }
@@ -213,12 +220,12 @@ def time_series_heatmap(price_data: pd.DataFrame, window: int = 20) -> Dict:
             'values': []
         }
         
-        for date, value in returns[symbol].items():
+        for date, value in zip(dates, returns[symbol].tolist()):
             intensity = min(abs(value) / 3.0, 1.0)
             color_class = 'green' if value > 0 else 'red' if value < 0 else 'neutral'
             
             symbol_data['values'].append({
-                'date': date.strftime('%Y-%m-%d'),
+                'date': date,
                 'value': value,
                 'intensity': intensity,
                 'color_class': color_class,
@@ -360,10 +367,13 @@ def intraday_heatmap(intraday_data: pd.DataFrame, interval: str = '15min') -> Di
     resampled = intraday_data.resample(interval).last()
     returns = resampled.pct_change().fillna(0) * 100
     
+    # Format the time axis once and reuse it for every symbol
+    times = returns.index.strftime('%H:%M').tolist()
+    
     heatmap = {
         'type': 'intraday_heatmap',
         'interval': interval,
-        'times': [t.strftime('%H:%M') for t in returns.index],
+        'times': times,
         'symbols': list(returns.columns),
         'data': []
     }
@@ -374,12 +384,12 @@ def intraday_heatmap(intraday_data: pd.DataFrame, interval: str = '15min') -> Di
             'intervals': []
         }
         
-        for time, value in returns[symbol].items():
+        for time, value in zip(times, returns[symbol].tolist()):
             intensity = min(abs(value) / 2.0, 1.0)  # Cap at 2% for intraday
             color_class = 'green' if value > 0 else 'red' if value < 0 else 'neutral'
             
             symbol_data['intervals'].append({
-                'time': time.strftime('%H:%M'),
+                'time': time,
                 'value': value,
                 'intensity': intensity,
                 'color_class': color_class,
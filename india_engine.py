@@ -1,4 +1,5 @@
 import yfinance as yf
+import numpy as np
 import pandas as pd
 import time
 from datetime import datetime, timedelta
@@ -24,9 +25,10 @@ class IndiaMarketEngine:
         "TECHM.NS", "TITAN.NS", "ULTRACEMCO.NS", "WIPRO.NS"
     ]
 
-    def __init__(self, cache_ttl=60):
+    def __init__(self, cache_ttl=60, history_ttl=3600):
         self.cache_ttl = cache_ttl
-        self.market_cache = {} # {symbol: {data: df, timestamp: ts}}
+        self.history_ttl = history_ttl
+        self.market_cache = {} # {(symbol, period, interval): {data: close series, timestamp: ts}}
         self.last_batch_fetch = None
         self.batch_data = None
         self.lock = threading.Lock()
@@ -93,6 +95,37 @@ class IndiaMarketEngine:
             print(f"[INDIA-ENGINE] Critical Fetch Error: {e}")
             return []
 
+    def get_close_history(self, symbols, period="3mo", interval="1d"):
+        """
+        Close prices for several symbols as one DataFrame (symbols as columns).
+        Series cached within history_ttl are reused; only the missing
+        symbols are downloaded from yfinance.
+        """
+        now = time.time()
+        series = {}
+        with self.lock:
+            for symbol in symbols:
+                entry = self.market_cache.get((symbol, period, interval))
+                if entry and now - entry["timestamp"] < self.history_ttl:
+                    series[symbol] = entry["data"]
+
+        missing = [s for s in symbols if s not in series]
+        if missing:
+            data = yf.download(missing, period=period, interval=interval, progress=False)
+            if 'Close' in data.columns:
+                closes = data['Close']
+                if isinstance(closes, pd.Series):
+                    closes = closes.to_frame(missing[0])
+                with self.lock:
+                    for symbol in missing:
+                        if symbol in closes.columns:
+                            close = closes[symbol].dropna()
+                            if close.empty: continue
+                            series[symbol] = close
+                            self.market_cache[(symbol, period, interval)] = {"data": close, "timestamp": now}
+
+        return pd.DataFrame({s: series[s] for s in symbols if s in series})
+
     def get_stock_analysis(self, symbol):
         """
         Deep dive for a single stock (User request: 'give real time evaluation')
@@ -151,33 +184,28 @@ class IndiaMarketEngine:
     def check_portfolio_health(self, portfolio):
         """
         Disruption Mode: Check monitored stocks
-        portfolio: list of {symbol, entry, limit}
+        portfolio: user_data.PortfolioArrays (symbols, entry prices, loss limits)
         """
-        alerts = []
-        for item in portfolio:
-            sym = item['symbol']
-            entry = item['entry_price']
-            limit_pct = item.get('limit', 10.0) # Default 10% loss limit
-            
-            # Use cached batch data if available for speed
-            current_price = 0
-            if self.batch_data:
-                match = next((x for x in self.batch_data if x['symbol'] == sym), None)
-                if match: current_price = match['price']
-            
-            # Fallback fetch
-            if current_price == 0:
-                # Todo: fetch individual or use last known
-                pass
-                
-            # Disruption Check
-            if current_price > 0:
-                loss_pct = ((entry - current_price) / entry) * 100
-                if loss_pct >= limit_pct:
-                    alerts.append({
-                        "symbol": sym,
-                        "status": "CRITICAL",
-                        "loss": round(loss_pct, 2),
-                        "message": f"Stop Loss Breach! Down {round(loss_pct, 1)}%"
-                    })
-        return alerts
+        if not len(portfolio.symbols):
+            return []
+        
+        # Use cached batch data if available for speed; unknown symbols price at 0
+        # Todo: fallback fetch for symbols missing from the batch
+        prices = {x['symbol']: x['price'] for x in self.batch_data or ()}
+        current = np.array([prices.get(sym, 0) for sym in portfolio.symbols], dtype=np.float64)
+        
+        # Disruption Check, all positions at once
+        entry = portfolio.entry_prices
+        with np.errstate(divide='ignore', invalid='ignore'):
+            loss_pct = (entry - current) / entry * 100
+        breached = (current > 0) & (loss_pct >= portfolio.stop_loss_limits)
+        
+        return [
+            {
+                "symbol": sym,
+                "status": "CRITICAL",
+                "loss": round(loss, 2),
+                "message": f"Stop Loss Breach! Down {round(loss, 1)}%"
+            }
+            for sym, loss in zip(portfolio.symbols[breached], loss_pct[breached].tolist())
+        ]
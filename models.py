@@ -1,8 +1,14 @@
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
 from typing import List, Dict
 import datetime
 
+@lru_cache(maxsize=1024)
+def format_hm(timestamp: datetime.datetime) -> str:
+    """"HH:MM" for a timestamp; every ticker shares the tick time, so this hits the cache."""
+    return timestamp.strftime("%H:%M")
+
 class SystemState(Enum):
     STABLE = "STABLE"
     HIGH_VOLATILITY = "HIGH_VOLATILITY"
@@ -23,6 +29,10 @@ class MarketEvent:
     description: str
     base_impact: float  # 0.0 to 10.0
     asset_class: str    # e.g., "CRYPTO", "STOCKS", "FOREX"
+    time_hm: str = field(init=False, repr=False, compare=False)  # "HH:MM", formatted once
+
+    def __post_init__(self):
+        self.time_hm = format_hm(self.timestamp)
     
 @dataclass
 class ProcessedEvent:
@@ -35,6 +45,10 @@ class PricePoint:
     timestamp: datetime.datetime
     price: float
     volume: int
+    time_hm: str = field(init=False, repr=False, compare=False)  # "HH:MM", formatted once
+
+    def __post_init__(self):
+        self.time_hm = format_hm(self.timestamp)
 
 @dataclass
 class Ticker:
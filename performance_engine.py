@@ -5,6 +5,18 @@ import os
 from typing import List, Dict, Tuple
 from dataclasses import asdict
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Numba is optional: without it the kernels run as plain NumPy code
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
 class HardwareNavigator:
     """
     Directs hardware acceleration by analyzing system load and optimizing 
@@ -55,9 +67,9 @@ class PerformanceEngine:
         lower = middle - (std * num_std)
         
         # Fill NaN values with the first valid value to avoid gaps
-        middle = middle.fillna(method='bfill')
-        upper = upper.fillna(method='bfill')
-        lower = lower.fillna(method='bfill')
+        middle = middle.bfill()
+        upper = upper.bfill()
+        lower = lower.bfill()
         
         return upper.values, middle.values, lower.values
 
@@ -108,3 +120,22 @@ class PerformanceEngine:
         dt_hours = (current_ts - timestamps) / 3600.0
         new_weights = weights * np.exp(-decay_rate * dt_hours)
         return new_weights
+
+
+@njit(cache=True, fastmath=True)
+def decayed_risk(base_impacts: np.ndarray,
+                 timestamps: np.ndarray,
+                 current_ts: float,
+                 decay_rate: float,
+                 threshold: float = 0.5) -> float:
+    """
+    Total decayed weight of the events still above `threshold`.
+    Same as summing calculate_decay_batch(...) over the kept events, in
+    one pass without the intermediate arrays.
+    """
+    total = 0.0
+    for i in range(base_impacts.shape[0]):
+        w = base_impacts[i] * np.exp(-decay_rate * (current_ts - timestamps[i]) / 3600.0)
+        if w > threshold:
+            total += w
+    return total
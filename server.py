@@ -1,29 +1,67 @@
 from fastapi import FastAPI, HTTPException, Body, Header
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import Headers
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
+from collections import OrderedDict
 from datetime import datetime, timedelta
-import random
+import functools
+import orjson
+import os
+import re
+import threading
+import time
 
 from models import MarketEvent, SystemState
-from engine import IntelligenceEngine
+from engine import IntelligenceEngine, TechnicalAnalysis
 from analyst import Analyst
 from india_engine import IndiaMarketEngine
 from user_data import UserManager
 from study_engine import StudyEngine
 from bloomberg_engine import BloombergEngine
-from volatility import VolatilityAnalyzer, rolling_volatility, historical_volatility, volatility_regime_detection
-from heatmap import HeatmapGenerator, sector_performance_heatmap, market_overview_heatmap, correlation_strength_heatmap
+from volatility import VolatilityAnalyzer, rolling_volatility, historical_volatility, last_hv, volatility_regime_detection
+from heatmap import HeatmapGenerator, calculate_correlation_matrix, sector_performance_heatmap, market_overview_heatmap, correlation_strength_heatmap
 import secrets
 import pandas as pd
 import numpy as np
+import requests
+import yfinance as yf
+import yfinance.exceptions as yf_errors
+
+# Base class of yfinance's own errors (rate limits, delisted symbols, ...);
+# older releases name it YFinanceException
+_YF_ERROR = getattr(yf_errors, "YFException", None) or getattr(yf_errors, "YFinanceException", Exception)
 
 ADMIN_KEY = "FIN-X-" + secrets.token_hex(2).upper()
 print(f"\n{'='*40}\n[SECURITY] ADMIN ACCESS KEY: {ADMIN_KEY}\n{'='*40}\n")
-SESSION_TOKENS = set()
-
-app = FastAPI(title="Financial Intelligence Terminal")
+# token -> monotonic expiry; insertion order is expiry order since the TTL is fixed
+SESSION_TOKENS = OrderedDict()
+SESSION_TOKEN_TTL = 3600 # seconds
+MAX_SESSION_TOKENS = 1024
+_TOKEN_LOCK = threading.Lock()
+
+def _issue_token() -> str:
+    token = secrets.token_hex(16)
+    with _TOKEN_LOCK:
+        if len(SESSION_TOKENS) >= MAX_SESSION_TOKENS:
+            SESSION_TOKENS.popitem(last=False)
+        SESSION_TOKENS[token] = time.monotonic() + SESSION_TOKEN_TTL
+    return token
+
+def _is_admin(token) -> bool:
+    expiry = SESSION_TOKENS.get(token)
+    return expiry is not None and expiry > time.monotonic()
+
+def _sweep_tokens():
+    now = time.monotonic()
+    with _TOKEN_LOCK:
+        while SESSION_TOKENS and next(iter(SESSION_TOKENS.values())) <= now:
+            SESSION_TOKENS.popitem(last=False)
+
+app = FastAPI(title="Financial Intelligence Terminal", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +70,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024) # charts/overview/news JSON compresses well
 
 # Global System State
 engine = IntelligenceEngine(decay_rate=0.2)
@@ -41,7 +80,22 @@ india_engine = IndiaMarketEngine()
 user_manager = UserManager()
 study_engine = StudyEngine()
 bloomberg_engine = BloombergEngine()
-current_time = datetime(2024, 1, 1, 9, 0, 0) # Simulation Start
+class SimulationState:
+    """
+    Simulation clock shared by request threads.
+    Anything that advances or re-evaluates the engine holds `lock`, so a
+    tick (clock + decay + prices + random event) is never seen half-applied.
+    """
+    def __init__(self, start: datetime):
+        self.lock = threading.RLock()
+        self.time = start
+
+sim = SimulationState(datetime(2024, 1, 1, 9, 0, 0)) # Simulation Start
+
+def _detect_state():
+    # detect_state also steps prices and writes to the DB, so it needs the lock too
+    with sim.lock:
+        return engine.detect_state(sim.time)
 
 # Seed Initial Data
 initial_events = [
@@ -49,14 +103,11 @@ initial_events = [
     ("Breaking: Inflation data higher than expected", 7.5),
 ]
 for desc, impact in initial_events:
-    engine.ingest(MarketEvent(current_time, "NEWS", desc, impact, "GENERAL"))
+    engine.ingest(MarketEvent(sim.time, "NEWS", desc, impact, "GENERAL"))
 
 # Pre-roll simulation to generate history (24 hours)
 print("Generating historical data...")
-for _ in range(96): # 96 * 15 mins = 24 hours
-    current_time += timedelta(minutes=15)
-    engine.apply_decay(current_time)
-    engine.detect_state(current_time)
+sim.time = engine.preroll(sim.time, 96) # 96 * 15 mins = 24 hours
 print("System ready.")
 
 class CommandRequest(BaseModel):
@@ -65,588 +116,722 @@ class CommandRequest(BaseModel):
 # Global state for UI monitoring
 LAST_COMMAND = {"cmd": "NONE", "status": "IDLE", "time": ""}
 
-@app.post("/command")
-def process_command(req: CommandRequest, x_auth_token: str = Header(None)):
-    global LAST_COMMAND
-    cmd = req.command.strip().upper()
-    
-    # Track command for Jarvis
-    LAST_COMMAND = {
-        "cmd": cmd,
-        "status": "EXECUTED",
-        "time": current_time.strftime("%H:%M:%S")
+def _history_columns(history):
+    """Price history as parallel t/p/v arrays instead of one dict per point."""
+    return {
+        "t": [p.time_hm for p in history],
+        "p": [p.price for p in history],
+        "v": [p.volume for p in history]
     }
-    
-    # 1. Deterministic Command Routing
-    if cmd == "TODAY":
-        return {
-            "type": "TABLE",
-            "title": "Today's Event Log",
-            "data": [
-                {
-                    "ID": i,
-                    "Time": e.original_event.timestamp.strftime("%H:%M"),
-                    "Description": e.original_event.description,
-                    "Relevance": round(e.current_weight, 2)
-                }
-                for i, e in enumerate(engine.events)
-            ]
-        }
-    
-    elif cmd == "RISKS":
-        snapshot = engine.detect_state(current_time) # Also triggers price update step if not called elsewhere, but we usually call step_simulation
-        # But for UI consistency, let's just GET the state.
-        # Ideally, simulation steps happen on a clock, but here we drive it via commands or specific update calls.
-        # Let's verify we are getting the latest.
-        return {
-            "type": "REPORT",
-            "title": "Risk Analysis",
-            "state": snapshot.state.value,
-            "risk_score": snapshot.risk_score,
-            "details": f"Regime: {snapshot.regime.value}\nTotal Risk: {snapshot.risk_score}\nDrivers: {len(snapshot.active_events)}"
-        }
-    
-    elif cmd == "MEMORY":
-        return {
-            "type": "CHART",
-            "title": "Memory Decay Visualization",
-            "data": [
-                {"label": e.original_event.description[:15]+"...", "value": e.current_weight}
-                for e in engine.events
-            ]
-        }
 
-    elif cmd.startswith("EVENT "):
-        try:
-            evt_id = int(cmd.split(" ")[1])
-            target_event = engine.events[evt_id]
-            explanation = analyst.explain_event(target_event)
-            return {
-                "type": "TEXT",
-                "title": f"Analyst Insight: Event #{evt_id}",
-                "content": explanation
+# === COMMAND HANDLERS ===
+# Each handler receives the normalized command, its arguments (tokens after
+# the verb) and the caller's auth token, and returns the response payload.
+
+# Payloads of argument-free views that only change when the simulation steps,
+# keyed by handler name -> (tick, payload[, json bytes]). Cleared by step_simulation.
+_RESPONSE_CACHE = {}
+
+def _tick_cached(handler):
+    @functools.wraps(handler)
+    def wrapper(cmd, args, x_auth_token):
+        tick = sim.time
+        entry = _RESPONSE_CACHE.get(handler.__name__)
+        if entry and entry[0] == tick:
+            return entry[1]
+        payload = handler(cmd, args, x_auth_token)
+        _RESPONSE_CACHE[handler.__name__] = (tick, payload)
+        return payload
+    return wrapper
+
+def _cached_bytes(payload):
+    """JSON bytes for a payload held in _RESPONSE_CACHE, encoded at most once per tick."""
+    for name, entry in list(_RESPONSE_CACHE.items()):
+        if entry[1] is payload:
+            if len(entry) == 2:
+                entry = _RESPONSE_CACHE[name] = (entry[0], payload, orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY))
+            return entry[2]
+    return None
+
+
+@_tick_cached
+def _handle_today(cmd, args, x_auth_token):
+    return {
+        "type": "TABLE",
+        "title": "Today's Event Log",
+        "data": [
+            {
+                "ID": i,
+                "Time": t,
+                "Description": d,
+                "Relevance": round(w, 2)
             }
-        except:
-             return {"type": "ERROR", "content": "Event ID Not Found."}
-             
-    elif cmd == "NIFTY":
-        snapshot = india_engine.fetch_market_snapshot()
-        return {
-            "type": "OVERVIEW_GRID",
-            "title": "REAL-TIME NIFTY 50 (LIVE)",
-            "grids": snapshot
-        }
-        
-    elif cmd.startswith("EVAL "):
-        target = cmd.split(" ")[1]
-        analysis = india_engine.get_stock_analysis(target)
-        if "error" in analysis: return {"type": "ERROR", "content": analysis["error"]}
-        
-        return {
-            "type": "REPORT",
-            "title": f"DEEP DIVE: {analysis['symbol']}",
-            "state": analysis['trend'],
-            "risk_score": 0.0,
-            "details": f"PREDICTION: {analysis['prediction']}\nFACTORS: {', '.join(analysis['factors'])}\nPRICE: {analysis['price']}\nWARNING: {analysis.get('warning') or 'None'}"
-        }
+            for i, (t, d, w) in enumerate(zip(engine.times_str, engine.descs, engine.weights.tolist()))
+        ]
+    }
 
-    elif cmd == "DISRUPTION":
-         alerts = india_engine.check_portfolio_health(user_manager.get_portfolio())
-         status_text = "SAFE" if not alerts else "CRITICAL RISK"
-         content = "Portfolio stable. No stop-loss breaches."
-         if alerts:
-             content = "⚠️ WARNING: DISRUPTION DETECTED ⚠️\n" + "\n".join([f"{a['symbol']}: {a['message']}" for a in alerts])
-             
-         return {
-             "type": "TEXT",
-             "title": f"DISRUPTION MONITOR: {status_text}",
-             "content": content
-         }
-
-    elif cmd.startswith("BUY "):
-        # Syntax: BUY SYM PRICE QTY
-        try:
-            parts = cmd.split(" ")
-            sym = parts[1]
-            price = float(parts[2])
-            qty = int(parts[3]) if len(parts) > 3 else 1
-            
-            success = user_manager.add_position(sym, price, qty)
-            if success:
-                return {"type": "SUCCESS", "content": f"Position Added: {qty} x {sym} @ {price}"}
-            else:
-                return {"type": "ERROR", "content": "Database Error."}
-        except:
-             return {"type": "ERROR", "content": "Usage: BUY [SYMBOL] [PRICE] [QTY]"}
-
-    elif cmd.startswith("QUOTE "):
-        symbol = cmd.split(" ")[1]
-        ticker = engine.get_ticker(symbol)
-        if ticker:
-            return {
-                "type": "QUOTE",
-                "title": f"Quote: {symbol}",
-                "symbol": ticker.symbol,
-                "price": ticker.current_price,
-                "change": float(f"{ticker.change_pct:.2f}"),
-                "history": [{"t": p.timestamp.strftime("%H:%M"), "p": p.price, "v": p.volume} for p in ticker.history]
-            }
-        else:
-            return {"type": "ERROR", "content": "Symbol Not Found."}
-
-    elif cmd.startswith("CHART "):
-        symbol = cmd.split(" ")[1]
-        ticker = engine.get_ticker(symbol)
-        if ticker:
-            return {
-                "type": "CHART",
-                "title": f"Market Data: {symbol}",
-                "data": engine.get_market_chart_data(symbol)
-            }
-        else:
-            # Fallback: Try India engine for NSE stocks
-            nse_symbol = symbol + ".NS" if not symbol.endswith(".NS") else symbol
-            try:
-                import yfinance as yf
-                data = yf.Ticker(nse_symbol).history(period="5d")
-                if not data.empty:
-                    history = [{"t": str(idx.strftime("%H:%M")), "p": float(row['Close']), "v": int(row['Volume'])} 
-                               for idx, row in data.iterrows()]
-                    return {
-                        "type": "CHART_FULL",
-                        "symbol": symbol.upper(),
-                        "history": history
-                    }
-            except Exception:
-                pass
-            return {"type": "ERROR", "content": "Symbol Not Found. Try NIFTY 50 symbols like TCS, INFY, RELIANCE."}
-
-    elif cmd == "DISRUPTION":
-         return {
-            "type": "TEXT",
-            "title": "Disruption Logic",
-            "content": "CRASH State Logic:\nIF Total_Risk_Score > 25.0\nAND Active_High_Impact_Events > 2\nTHEN STATE = CRASH\nELSE STATE = VOLATILE or STABLE"
-        }
-    
-    elif cmd == "SCAN":
-        snapshot = engine.detect_state(current_time)
-        return {
-            "type": "TEXT",
-            "title": "System Scan",
-            "content": f"SCAN COMPLETE.\nREGIME: {snapshot.regime.value}\nVOLATILITY INDEX: {engine.get_ticker('VIX').current_price}\nANOMALIES: {len(snapshot.active_events)} active risk events."
-        }
+def _handle_risks(cmd, args, x_auth_token):
+    snapshot = _detect_state() # Also triggers price update step if not called elsewhere, but we usually call step_simulation
+    # But for UI consistency, let's just GET the state.
+    # Ideally, simulation steps happen on a clock, but here we drive it via commands or specific update calls.
+    # Let's verify we are getting the latest.
+    return {
+        "type": "REPORT",
+        "title": "Risk Analysis",
+        "state": snapshot.state.value,
+        "risk_score": snapshot.risk_score,
+        "details": f"Regime: {snapshot.regime.value}\nTotal Risk: {snapshot.risk_score}\nDrivers: {len(snapshot.active_events)}"
+    }
 
-    elif cmd == "OVERVIEW":
-        # Return history for a grid of key/popular tickers
-        targets = ["SPX", "NDX", "BTC", "VIX", "AAPL", "NVDA", "WTI", "JPM", "XOM"]
-        grid_data = []
-        for sym in targets:
-            t = engine.get_ticker(sym)
-            if t:
-                grid_data.append({
-                    "symbol": t.symbol,
-                    "price": t.current_price,
-                    "change": float(f"{t.change_pct:.2f}"),
-                    "history": [{"p": p.price} for p in t.history] # minimal history
-                })
-        
-        return {
-            "type": "OVERVIEW_GRID",
-            "title": "Global Market Overview",
-            "grids": grid_data
-        }
+@_tick_cached
+def _handle_memory(cmd, args, x_auth_token):
+    return {
+        "type": "CHART",
+        "title": "Memory Decay Visualization",
+        "data": [
+            {"label": d[:15]+"...", "value": w}
+            for d, w in zip(engine.descs, engine.weights.tolist())
+        ]
+    }
 
-    elif cmd == "NEWS":
-        # Filter for high importance or energy
-        news_items = [e for e in engine.events if e.current_weight > 4.0 or "Inf" in e.original_event.description]
-        return {
-            "type": "NEWS_FEED",
-            "title": "High-Impact Intelligence Stream",
-            "data": [
-                 {
-                    "time": e.original_event.timestamp.strftime("%H:%M"),
-                    "source": "REUTERS/BLOOMBERG",
-                    "headline": e.original_event.description,
-                    "impact": e.original_event.base_impact
-                 }
-                 for e in news_items
-            ]
-        }
+def _handle_event(cmd, args, x_auth_token):
+    try:
+        evt_id = int(args[0])
+        target_event = engine.events[evt_id]
+    except (IndexError, ValueError):
+         return {"type": "ERROR", "content": "Event ID Not Found."}
 
-    elif cmd == "STUDY":
-        # Main Study Section - Live News + Resources
-        data = study_engine.get_study_overview()
-        return {
-            "type": "STUDY_VIEW",
-            "title": "📚 STUDY CENTER",
-            "news": data["news"],
-            "resources": data["resources"],
-            "glossary_count": data["glossary_count"],
-            "last_updated": data["last_updated"]
-        }
-    
-    elif cmd.startswith("LEARN "):
-        # Learning resources by topic
-        topic = cmd.split(" ", 1)[1] if len(cmd.split(" ")) > 1 else None
-        resources = study_engine.get_study_resources(topic)
+    explanation = analyst.explain_event(target_event)
+    return {
+        "type": "TEXT",
+        "title": f"Analyst Insight: Event #{evt_id}",
+        "content": explanation
+    }
+
+def _handle_nifty(cmd, args, x_auth_token):
+    snapshot = india_engine.fetch_market_snapshot()
+    return {
+        "type": "OVERVIEW_GRID",
+        "title": "REAL-TIME NIFTY 50 (LIVE)",
+        "grids": snapshot
+    }
+
+def _handle_eval(cmd, args, x_auth_token):
+    if not args:
+        return {"type": "ERROR", "content": "Usage: EVAL [SYMBOL]"}
+    analysis = india_engine.get_stock_analysis(args[0])
+    if "error" in analysis: return {"type": "ERROR", "content": analysis["error"]}
+
+    return {
+        "type": "REPORT",
+        "title": f"DEEP DIVE: {analysis['symbol']}",
+        "state": analysis['trend'],
+        "risk_score": 0.0,
+        "details": f"PREDICTION: {analysis['prediction']}\nFACTORS: {', '.join(analysis['factors'])}\nPRICE: {analysis['price']}\nWARNING: {analysis.get('warning') or 'None'}"
+    }
+
+def _handle_disruption(cmd, args, x_auth_token):
+    alerts = india_engine.check_portfolio_health(user_manager.get_portfolio_arrays())
+    status_text = "SAFE" if not alerts else "CRITICAL RISK"
+    content = "Portfolio stable. No stop-loss breaches."
+    if alerts:
+        content = "⚠️ WARNING: DISRUPTION DETECTED ⚠️\n" + "\n".join([f"{a['symbol']}: {a['message']}" for a in alerts])
+
+    return {
+        "type": "TEXT",
+        "title": f"DISRUPTION MONITOR: {status_text}",
+        "content": content
+    }
+
+def _handle_buy(cmd, args, x_auth_token):
+    # Syntax: BUY SYM PRICE QTY
+    try:
+        sym = args[0]
+        price = float(args[1])
+        qty = int(args[2]) if len(args) > 2 else 1
+    except (IndexError, ValueError):
+         return {"type": "ERROR", "content": "Usage: BUY [SYMBOL] [PRICE] [QTY]"}
+
+    success = user_manager.add_position(sym, price, qty)
+    if success:
+        return {"type": "SUCCESS", "content": f"Position Added: {qty} x {sym} @ {price}"}
+    else:
+        return {"type": "ERROR", "content": "Database Error."}
+
+def _handle_quote(cmd, args, x_auth_token):
+    ticker = engine.get_ticker(args[0]) if args else None
+    if ticker:
         return {
-            "type": "LEARN_VIEW",
-            "title": f"📖 Learning: {topic or 'All Topics'}",
-            "resources": resources
+            "type": "QUOTE",
+            "title": f"Quote: {args[0]}",
+            "symbol": ticker.symbol,
+            "price": ticker.current_price,
+            "change": float(f"{ticker.change_pct:.2f}"),
+            "history": _history_columns(ticker.history)
         }
-    
-    elif cmd.startswith("GLOSSARY"):
-        # Market terms glossary
-        parts = cmd.split(" ", 1)
-        term = parts[1] if len(parts) > 1 else None
-        glossary = study_engine.get_glossary(term)
+    else:
+        return {"type": "ERROR", "content": "Symbol Not Found."}
+
+def _handle_chart(cmd, args, x_auth_token):
+    if not args:
+        return {"type": "ERROR", "content": "Usage: CHART [SYMBOL]"}
+    symbol = args[0]
+    ticker = engine.get_ticker(symbol)
+    if ticker:
+        u, m, l = TechnicalAnalysis.bands_for(ticker)
         return {
-            "type": "GLOSSARY_VIEW",
-            "title": f"📋 {term.title() if term else 'Market Glossary'}",
-            "terms": glossary
+            "type": "CHART_FULL",
+            "symbol": ticker.symbol,
+            "history": _history_columns(ticker.history),
+            "bands": {"upper": u, "middle": m, "lower": l}
         }
+    else:
+        # Fallback: Try India engine for NSE stocks
+        nse_symbol = symbol + ".NS" if not symbol.endswith(".NS") else symbol
+        try:
+            data = yf.Ticker(nse_symbol).history(period="5d")
+            if not data.empty:
+                history = {
+                    "t": data.index.strftime("%H:%M").tolist(),
+                    "p": data['Close'].astype(float).tolist(),
+                    "v": data['Volume'].astype(int).tolist()
+                }
+                return {
+                    "type": "CHART_FULL",
+                    "symbol": symbol.upper(),
+                    "history": history
+                }
+        except Exception:
+            pass
+        return {"type": "ERROR", "content": "Symbol Not Found. Try NIFTY 50 symbols like TCS, INFY, RELIANCE."}
 
-    # === BLOOMBERG-STYLE FEATURES ===
-    elif cmd == "FX":
-        rates = bloomberg_engine.get_fx_rates()
-        return {
-            "type": "FX_VIEW",
-            "title": "💱 LIVE FX RATES",
-            "rates": rates,
-            "updated": datetime.now().strftime("%H:%M:%S")
-        }
-    
-    elif cmd.startswith("SCREEN"):
-        parts = cmd.split(" ")
-        criteria = parts[1] if len(parts) > 1 else "GAINERS"
-        market_data = india_engine.fetch_market_snapshot()
-        results = bloomberg_engine.screen_stocks(market_data, criteria)
-        return {
-            "type": "SCREENER_VIEW",
-            "title": f"🔍 SCREENER: {criteria.upper()}",
-            "criteria": criteria.upper(),
-            "results": results
+def _handle_scan(cmd, args, x_auth_token):
+    snapshot = _detect_state()
+    return {
+        "type": "TEXT",
+        "title": "System Scan",
+        "content": f"SCAN COMPLETE.\nREGIME: {snapshot.regime.value}\nVOLATILITY INDEX: {engine.get_ticker('VIX').current_price}\nANOMALIES: {len(snapshot.active_events)} active risk events."
+    }
+
+# Grid of key/popular tickers shown by OVERVIEW
+OVERVIEW_TICKERS = ("SPX", "NDX", "BTC", "VIX", "AAPL", "NVDA", "WTI", "JPM", "XOM")
+
+@_tick_cached
+def _handle_overview(cmd, args, x_auth_token):
+    # Return history for a grid of key/popular tickers
+    grid_data = [
+        {
+            "symbol": t.symbol,
+            "price": t.current_price,
+            "change": float(f"{t.change_pct:.2f}"),
+            "history": [{"p": p.price} for p in t.history] # minimal history
         }
-    
-    elif cmd == "MOVERS":
-        market_data = india_engine.fetch_market_snapshot()
-        movers = bloomberg_engine.get_top_movers(market_data)
-        summary = bloomberg_engine.get_market_summary(market_data)
+        for t in engine.get_tickers(OVERVIEW_TICKERS)
+    ]
+
+    return {
+        "type": "OVERVIEW_GRID",
+        "title": "Global Market Overview",
+        "grids": grid_data
+    }
+
+@_tick_cached
+def _handle_news(cmd, args, x_auth_token):
+    # Filter for high importance or energy
+    mask = (engine.weights > 4.0) | np.array(["Inf" in d for d in engine.descs], dtype=bool)
+    idx = np.flatnonzero(mask).tolist()
+    impacts = engine.base_impacts.tolist()
+    return {
+        "type": "NEWS_FEED",
+        "title": "High-Impact Intelligence Stream",
+        "data": [
+             {
+                "time": engine.times_str[i],
+                "source": "REUTERS/BLOOMBERG",
+                "headline": engine.descs[i],
+                "impact": impacts[i]
+             }
+             for i in idx
+        ]
+    }
+
+def _handle_study(cmd, args, x_auth_token):
+    # Main Study Section - Live News + Resources
+    data = study_engine.get_study_overview()
+    return {
+        "type": "STUDY_VIEW",
+        "title": "📚 STUDY CENTER",
+        "news": data["news"],
+        "resources": data["resources"],
+        "glossary_count": data["glossary_count"],
+        "last_updated": data["last_updated"]
+    }
+
+def _handle_learn(cmd, args, x_auth_token):
+    # Learning resources by topic
+    topic = " ".join(args) or None
+    resources = study_engine.get_study_resources(topic)
+    return {
+        "type": "LEARN_VIEW",
+        "title": f"📖 Learning: {topic or 'All Topics'}",
+        "resources": resources
+    }
+
+def _handle_glossary(cmd, args, x_auth_token):
+    # Market terms glossary
+    term = " ".join(args) or None
+    glossary = study_engine.get_glossary(term)
+    return {
+        "type": "GLOSSARY_VIEW",
+        "title": f"📋 {term.title() if term else 'Market Glossary'}",
+        "terms": glossary
+    }
+
+# === BLOOMBERG-STYLE FEATURES ===
+def _handle_fx(cmd, args, x_auth_token):
+    rates = bloomberg_engine.get_fx_rates()
+    return {
+        "type": "FX_VIEW",
+        "title": "💱 LIVE FX RATES",
+        "rates": rates,
+        "updated": datetime.now().strftime("%H:%M:%S")
+    }
+
+def _handle_screen(cmd, args, x_auth_token):
+    criteria = args[0] if args else "GAINERS"
+    market_data = india_engine.fetch_market_snapshot()
+    results = bloomberg_engine.screen_stocks(market_data, criteria)
+    return {
+        "type": "SCREENER_VIEW",
+        "title": f"🔍 SCREENER: {criteria.upper()}",
+        "criteria": criteria.upper(),
+        "results": results
+    }
+
+def _handle_movers(cmd, args, x_auth_token):
+    market_data = india_engine.fetch_market_snapshot()
+    movers = bloomberg_engine.get_top_movers(market_data)
+    summary = bloomberg_engine.get_market_summary(market_data)
+    return {
+        "type": "MOVERS_VIEW",
+        "title": "📈 TOP MOVERS",
+        "gainers": movers["gainers"],
+        "losers": movers["losers"],
+        "summary": summary
+    }
+
+def _handle_sectors(cmd, args, x_auth_token):
+    sectors = bloomberg_engine.get_sector_performance()
+    return {
+        "type": "SECTORS_VIEW",
+        "title": "🏢 SECTOR HEATMAP",
+        "sectors": sectors,
+        "updated": datetime.now().strftime("%H:%M:%S")
+    }
+
+def _handle_calendar(cmd, args, x_auth_token):
+    events = bloomberg_engine.get_economic_calendar()
+    return {
+        "type": "CALENDAR_VIEW",
+        "title": "📅 ECONOMIC CALENDAR",
+        "events": events
+    }
+
+# === VOLATILITY ANALYSIS COMMANDS ===
+def _handle_vol(cmd, args, x_auth_token):
+    # Volatility analysis for a specific symbol
+    if not args:
+        return {"type": "ERROR", "content": "Usage: VOL [SYMBOL]"}
+    symbol = args[0]
+
+    # Try to get data from India engine first
+    nse_symbol = f"{symbol}.NS" if not symbol.endswith(".NS") else symbol
+    try:
+        ticker_data = yf.Ticker(nse_symbol)
+        hist = ticker_data.history(period="3mo", interval="1d")
+
+        if hist.empty:
+            return {"type": "ERROR", "content": f"No data found for {symbol}"}
+
+        # Create volatility analyzer
+        prices = hist['Close']
+        analyzer = VolatilityAnalyzer(
+            prices=prices,
+            high=hist['High'],
+            low=hist['Low'],
+            open_price=hist['Open']
+        )
+
+        # Get all metrics
+        metrics = analyzer.get_all_metrics(window=20)
+
+        # Calculate additional metrics
+        close = prices.to_numpy(dtype=float)
+        vol_20 = last_hv(close, 20) if len(prices) > 20 else 0
+        vol_50 = last_hv(close, 50) if len(prices) > 50 else 0
+        regime = volatility_regime_detection(prices, window=20).iloc[-1]
+
         return {
-            "type": "MOVERS_VIEW",
-            "title": "📈 TOP MOVERS",
-            "gainers": movers["gainers"],
-            "losers": movers["losers"],
-            "summary": summary
+            "type": "VOLATILITY_VIEW",
+            "title": f"📊 VOLATILITY ANALYSIS: {symbol}",
+            "symbol": symbol,
+            "current_price": float(prices.iloc[-1]),
+            "metrics": {
+                "rolling_vol_20d": f"{metrics.get('rolling_vol', 0):.4f}",
+                "historical_vol_annual": f"{metrics.get('historical_vol', 0):.2%}",
+                "ewma_vol": f"{metrics.get('ewma_vol', 0):.4f}",
+                "vol_percentile": f"{metrics.get('vol_percentile', 0):.1f}%",
+                "parkinson_vol": f"{metrics.get('parkinson_vol', 0):.4f}" if 'parkinson_vol' in metrics else "N/A",
+                "garman_klass_vol": f"{metrics.get('garman_klass_vol', 0):.4f}" if 'garman_klass_vol' in metrics else "N/A"
+            },
+            "regime": regime,
+            "comparison": {
+                "vol_20d": f"{vol_20:.2%}",
+                "vol_50d": f"{vol_50:.2%}",
+                "vol_ratio": f"{(vol_20/vol_50 if vol_50 > 0 else 1.0):.2f}"
+            }
         }
-    
-    elif cmd == "SECTORS":
+    except Exception as e:
+        return {"type": "ERROR", "content": f"Volatility analysis error: {str(e)}"}
+
+def _compute_vol_for_stock(stock):
+    """10-day volatility row for one snapshot entry, or None when there is no usable history."""
+    try:
+        hist = yf.Ticker(stock['symbol'] + ".NS").history(period="1mo", interval="1d")
+    except (requests.exceptions.RequestException, _YF_ERROR, KeyError):
+        return None
+
+    if hist.empty or len(hist) <= 10 or 'Close' not in hist:
+        return None
+
+    prices = hist['Close']
+    return {
+        "symbol": stock['symbol'],
+        "price": stock['price'],
+        "volatility": last_hv(prices.to_numpy(dtype=float), 10),
+        "regime": volatility_regime_detection(prices, window=10).iloc[-1],
+        "change_pct": stock.get('change_pct', 0)
+    }
+
+def _handle_volscan(cmd, args, x_auth_token):
+    # Scan market for high volatility stocks
+    market_data = india_engine.fetch_market_snapshot()
+
+    if not market_data:
+        return {"type": "ERROR", "content": "No market data available"}
+
+    # Calculate volatility for each stock
+    results = [_compute_vol_for_stock(stock) for stock in market_data[:20]]  # Limit to first 20 for performance
+    vol_stocks = [r for r in results if r is not None]
+
+    # Sort by volatility descending
+    vol_stocks = sorted(vol_stocks, key=lambda x: x['volatility'], reverse=True)
+
+    return {
+        "type": "VOLSCAN_VIEW",
+        "title": "🔥 HIGH VOLATILITY SCANNER",
+        "count": len(vol_stocks),
+        "data": vol_stocks[:15]  # Top 15
+    }
+
+def _handle_heatmap(cmd, args, x_auth_token):
+    # Heatmap visualization
+    heatmap_type = args[0].upper() if args else "SECTOR"
+
+    if heatmap_type == "SECTOR":
         sectors = bloomberg_engine.get_sector_performance()
+        heatmap_data = sector_performance_heatmap(sectors)
+
         return {
-            "type": "SECTORS_VIEW",
-            "title": "🏢 SECTOR HEATMAP",
-            "sectors": sectors,
-            "updated": datetime.now().strftime("%H:%M:%S")
+            "type": "HEATMAP_VIEW",
+            "title": "🗺️ SECTOR PERFORMANCE HEATMAP",
+            "heatmap_type": "sector",
+            "data": heatmap_data
         }
-    
-    elif cmd == "CALENDAR":
-        events = bloomberg_engine.get_economic_calendar()
+
+    elif heatmap_type == "MARKET":
+        market_data = india_engine.fetch_market_snapshot()
+        heatmap_data = market_overview_heatmap(market_data, metric='change_pct')
+
         return {
-            "type": "CALENDAR_VIEW",
-            "title": "📅 ECONOMIC CALENDAR",
-            "events": events
+            "type": "HEATMAP_VIEW",
+            "title": "🗺️ MARKET OVERVIEW HEATMAP",
+            "heatmap_type": "market",
+            "data": heatmap_data
         }
-    
-    # === VOLATILITY ANALYSIS COMMANDS ===
-    elif cmd.startswith("VOL "):
-        # Volatility analysis for a specific symbol
-        symbol = cmd.split(" ")[1]
-        
-        # Try to get data from India engine first
-        nse_symbol = f"{symbol}.NS" if not symbol.endswith(".NS") else symbol
-        try:
-            import yfinance as yf
-            ticker_data = yf.Ticker(nse_symbol)
-            hist = ticker_data.history(period="3mo", interval="1d")
-            
-            if hist.empty:
-                return {"type": "ERROR", "content": f"No data found for {symbol}"}
-            
-            # Create volatility analyzer
-            prices = hist['Close']
-            analyzer = VolatilityAnalyzer(
-                prices=prices,
-                high=hist['High'],
-                low=hist['Low'],
-                open_price=hist['Open']
-            )
-            
-            # Get all metrics
-            metrics = analyzer.get_all_metrics(window=20)
-            
-            # Calculate additional metrics
-            vol_20 = historical_volatility(prices, window=20).iloc[-1] if len(prices) > 20 else 0
-            vol_50 = historical_volatility(prices, window=50).iloc[-1] if len(prices) > 50 else 0
-            regime = volatility_regime_detection(prices, window=20).iloc[-1]
-            
-            return {
-                "type": "VOLATILITY_VIEW",
-                "title": f"📊 VOLATILITY ANALYSIS: {symbol}",
-                "symbol": symbol,
-                "current_price": float(prices.iloc[-1]),
-                "metrics": {
-                    "rolling_vol_20d": f"{metrics.get('rolling_vol', 0):.4f}",
-                    "historical_vol_annual": f"{metrics.get('historical_vol', 0):.2%}",
-                    "ewma_vol": f"{metrics.get('ewma_vol', 0):.4f}",
-                    "vol_percentile": f"{metrics.get('vol_percentile', 0):.1f}%",
-                    "parkinson_vol": f"{metrics.get('parkinson_vol', 0):.4f}" if 'parkinson_vol' in metrics else "N/A",
-                    "garman_klass_vol": f"{metrics.get('garman_klass_vol', 0):.4f}" if 'garman_klass_vol' in metrics else "N/A"
-                },
-                "regime": regime,
-                "comparison": {
-                    "vol_20d": f"{vol_20:.2%}",
-                    "vol_50d": f"{vol_50:.2%}",
-                    "vol_ratio": f"{(vol_20/vol_50 if vol_50 > 0 else 1.0):.2f}"
-                }
-            }
-        except Exception as e:
-            return {"type": "ERROR", "content": f"Volatility analysis error: {str(e)}"}
-    
-    elif cmd == "VOLSCAN":
-        # Scan market for high volatility stocks
+
+    elif heatmap_type == "VOLUME":
         market_data = india_engine.fetch_market_snapshot()
-        
-        if not market_data:
-            return {"type": "ERROR", "content": "No market data available"}
-        
-        # Calculate volatility for each stock
-        vol_stocks = []
-        for stock in market_data[:20]:  # Limit to first 20 for performance
-            try:
-                symbol = stock['symbol'] + ".NS"
-                import yfinance as yf
-                hist = yf.Ticker(symbol).history(period="1mo", interval="1d")
-                
-                if not hist.empty and len(hist) > 10:
-                    prices = hist['Close']
-                    vol = historical_volatility(prices, window=10, annualize=True).iloc[-1]
-                    regime = volatility_regime_detection(prices, window=10).iloc[-1]
-                    
-                    vol_stocks.append({
-                        "symbol": stock['symbol'],
-                        "price": stock['price'],
-                        "volatility": vol,
-                        "regime": regime,
-                        "change_pct": stock.get('change_pct', 0)
-                    })
-            except:
-                continue
-        
-        # Sort by volatility descending
-        vol_stocks = sorted(vol_stocks, key=lambda x: x['volatility'], reverse=True)
-        
+        heatmap_data = market_overview_heatmap(market_data, metric='volume')
+
         return {
-            "type": "VOLSCAN_VIEW",
-            "title": "🔥 HIGH VOLATILITY SCANNER",
-            "count": len(vol_stocks),
-            "data": vol_stocks[:15]  # Top 15
+            "type": "HEATMAP_VIEW",
+            "title": "🗺️ VOLUME HEATMAP",
+            "heatmap_type": "volume",
+            "data": heatmap_data
         }
-    
-    elif cmd.startswith("HEATMAP"):
-        # Heatmap visualization
-        parts = cmd.split(" ")
-        heatmap_type = parts[1].upper() if len(parts) > 1 else "SECTOR"
-        
-        if heatmap_type == "SECTOR":
-            sectors = bloomberg_engine.get_sector_performance()
-            heatmap_data = sector_performance_heatmap(sectors)
-            
-            return {
-                "type": "HEATMAP_VIEW",
-                "title": "🗺️ SECTOR PERFORMANCE HEATMAP",
-                "heatmap_type": "sector",
-                "data": heatmap_data
-            }
-        
-        elif heatmap_type == "MARKET":
-            market_data = india_engine.fetch_market_snapshot()
-            heatmap_data = market_overview_heatmap(market_data, metric='change_pct')
-            
-            return {
-                "type": "HEATMAP_VIEW",
-                "title": "🗺️ MARKET OVERVIEW HEATMAP",
-                "heatmap_type": "market",
-                "data": heatmap_data
-            }
-        
-        elif heatmap_type == "VOLUME":
-            market_data = india_engine.fetch_market_snapshot()
-            heatmap_data = market_overview_heatmap(market_data, metric='volume')
-            
-            return {
-                "type": "HEATMAP_VIEW",
-                "title": "🗺️ VOLUME HEATMAP",
-                "heatmap_type": "volume",
+
+    else:
+        return {"type": "ERROR", "content": "Usage: HEATMAP [SECTOR/MARKET/VOLUME]"}
+
+CORR_SYMBOLS = ["RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS",
+                "HINDUNILVR.NS", "ITC.NS", "SBIN.NS", "BHARTIARTL.NS", "KOTAKBANK.NS"]
+# Correlations over 3 months of daily closes barely move intraday
+CORR_CACHE_TTL = 3600
+_CORR_CACHE = {"t": 0.0, "v": None}
+
+def _handle_corr(cmd, args, x_auth_token):
+    # Correlation matrix heatmap
+    now = time.monotonic()
+    if _CORR_CACHE["v"] is not None and now - _CORR_CACHE["t"] < CORR_CACHE_TTL:
+        return _CORR_CACHE["v"]
+
+    try:
+        # Get NIFTY 50 data for correlation analysis (cached per symbol by the India engine)
+        price_data = india_engine.get_close_history(CORR_SYMBOLS, period="3mo", interval="1d")
+
+        if price_data.shape[1] > 1:
+            # Calculate correlation matrix
+            corr_matrix = calculate_correlation_matrix(price_data)
+
+            # Generate heatmap
+            heatmap_data = correlation_strength_heatmap(corr_matrix, threshold=0.5)
+
+            result = {
+                "type": "CORRELATION_VIEW",
+                "title": "🔗 CORRELATION MATRIX",
                 "data": heatmap_data
             }
-        
+            _CORR_CACHE["t"], _CORR_CACHE["v"] = now, result
+            return result
         else:
-            return {"type": "ERROR", "content": "Usage: HEATMAP [SECTOR/MARKET/VOLUME]"}
-    
-    elif cmd == "CORR":
-        # Correlation matrix heatmap
-        try:
-            # Get NIFTY 50 data for correlation analysis
-            import yfinance as yf
-            symbols = ["RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS", 
-                      "HINDUNILVR.NS", "ITC.NS", "SBIN.NS", "BHARTIARTL.NS", "KOTAKBANK.NS"]
-            
-            # Download data
-            data = yf.download(symbols, period="3mo", interval="1d", progress=False)
-            
-            if 'Close' in data.columns:
-                price_data = data['Close']
-                
-                # Calculate correlation matrix
-                from heatmap import calculate_correlation_matrix
-                corr_matrix = calculate_correlation_matrix(price_data)
-                
-                # Generate heatmap
-                heatmap_data = correlation_strength_heatmap(corr_matrix, threshold=0.5)
-                
-                return {
-                    "type": "CORRELATION_VIEW",
-                    "title": "🔗 CORRELATION MATRIX",
-                    "data": heatmap_data
-                }
-            else:
-                return {"type": "ERROR", "content": "Unable to fetch correlation data"}
-                
-        except Exception as e:
-            return {"type": "ERROR", "content": f"Correlation analysis error: {str(e)}"}
-
-        
-    elif cmd.startswith("ADVISE"):
-        # "Heavy Logic" Advisor
-        # usage: ADVISE AAPL or just ADVISE (for general system)
-        parts = cmd.split(" ")
-        target = parts[1] if len(parts) > 1 else "SPX"
-        ticker = engine.get_ticker(target)
-        
-        if not ticker:
-             return {"type": "ERROR", "content": "Symbol Not Found."}
-             
-        from engine import TechnicalAnalysis
-        analysis = TechnicalAnalysis.analyze_risk_depth(ticker)
-        
-        return {
-            "type": "REPORT",
-            "title": f"ALGORITHMIC ADVISOR: {target}",
-            "state": analysis['depth'],
-            "risk_score": engine.detect_state(current_time).risk_score,
-            "details": f"STRATEGY: {analysis['advice']}\nBEST BID: {analysis['bid']:.2f}\nVOLATILITY SPREAD: {analysis['volatility']:.4f}\n\nLOGIC: Price deviation from Bollinger Mean suggests {analysis['depth'].lower()} conditions. Supply metrics confirm trend."
-        }
-        
-
-    
-    # AUTH Handshake
-    if cmd.startswith("AUTH "):
-        key = cmd.split(" ")[1]
-        if key == ADMIN_KEY:
-            token = secrets.token_hex(16)
-            SESSION_TOKENS.add(token)
-            return {
-                "type": "AUTH_SUCCESS", 
-                "title": "ACCESS GRANTED",
-                "token": token,
-                "content": "Identity Verified. Admin Console Unlocked."
-            }
-        else:
-             return {"type": "ERROR", "content": "ACCESS DENIED. Invalid Key."}
+            return {"type": "ERROR", "content": "Unable to fetch correlation data"}
 
-    # Protected Commands
-    is_admin = x_auth_token in SESSION_TOKENS
-    
-    if cmd.startswith("SQL "):
-        if not is_admin:
-            return {"type": "ERROR", "content": "UNAUTHORIZED. Admin Access Required (Use AUTH [KEY])."}
-        
-        query = cmd[4:]
-        try:
-            # Dangerous! Only for simulated admin console
-            conn = engine.db.conn
-            cursor = conn.execute(query)
-            conn.commit()
-            
-            if query.strip().upper().startswith("SELECT"):
-                cols = [description[0] for description in cursor.description]
-                rows = cursor.fetchall()
-                # Format as simple text table
-                res = " | ".join(cols) + "\n" + "-" * 50 + "\n"
-                for row in rows[:20]: # Limit output
-                    res += " | ".join(map(str, row)) + "\n"
-                if len(rows) > 20: res += f"... ({len(rows)} total rows)"
-                
-                return {"type": "TEXT", "title": "SQL RESULT", "content": res}
-            else:
-                return {"type": "SUCCESS", "content": f"Query Executed. Rows affected: {cursor.rowcount}"}
-                
-        except Exception as e:
-            return {"type": "ERROR", "content": f"SQL ERROR: {str(e)}"}
+    except Exception as e:
+        return {"type": "ERROR", "content": f"Correlation analysis error: {str(e)}"}
 
-    if cmd == "HELP" or cmd == "ACTIONS":
-        return {
-            "type": "HELP_MENU",
-            "title": "Command Palette Actions",
-            "sections": [
-                {"category": "DASHBOARDS", "cmds": ["OVERVIEW (Main Grid)", "NIFTY (India Market)", "MOVERS (Top Gainers/Losers)"]},
-                {"category": "BLOOMBERG", "cmds": ["FX (Currency Rates)", "SCREEN [GAINERS/LOSERS/VOLUME]", "SECTORS (Heatmap)", "CALENDAR (Events)"]},
-                {"category": "ANALYSIS", "cmds": ["CHART [SYM] (View Chart)", "QUOTE [SYM] (Price)", "ADVISE [SYM] (AI Insight)", "NEWS (Intel Feed)"]},
-                {"category": "VOLATILITY", "cmds": ["VOL [SYM] (Volatility Analysis)", "VOLSCAN (High Vol Scanner)", "CORR (Correlation Matrix)"]},
-                {"category": "HEATMAPS", "cmds": ["HEATMAP SECTOR (Sector Map)", "HEATMAP MARKET (Market Map)", "HEATMAP VOLUME (Volume Map)"]},
-                {"category": "STUDY", "cmds": ["STUDY (News & Learn)", "LEARN [TOPIC] (Resources)", "GLOSSARY [TERM] (Definitions)"]},
-                {"category": "SYSTEM", "cmds": ["TODAY (Event Log)", "RISKS (System State)", "SCAN (Quick Diag)", "NEXT (Step Sim)"]},
-                {"category": "ADMIN", "cmds": ["AUTH [KEY] (Login)", "SQL [QUERY] (DB Access)"]}
-            ]
-        }
+def _handle_advise(cmd, args, x_auth_token):
+    # "Heavy Logic" Advisor
+    # usage: ADVISE AAPL or just ADVISE (for general system)
+    target = args[0] if args else "SPX"
+    ticker = engine.get_ticker(target)
 
+    if not ticker:
+         return {"type": "ERROR", "content": "Symbol Not Found."}
 
-    elif cmd.startswith("CHART "):
-        symbol = cmd.split(" ")[1]
-        ticker = engine.get_ticker(symbol)
-        if ticker:
-             from engine import TechnicalAnalysis
-             u, m, l = TechnicalAnalysis.calculate_bollinger_bands(ticker.history)
-             return {
-                "type": "CHART_FULL",
-                "symbol": ticker.symbol,
-                "history": [{"t": p.timestamp.strftime("%H:%M"), "p": p.price, "v": p.volume} for p in ticker.history],
-                "bands": {"upper": u, "middle": m, "lower": l}
-            }
-        else:
-            return {"type": "ERROR", "content": "Symbol Not Found."}
-        
-    elif cmd == "NEXT":
-        step_simulation()
-        return {"type": "TEXT", "title": "System Update", "content": "Time advanced +30 mins. Prices updated."}
+    analysis = TechnicalAnalysis.analyze_risk_depth(ticker)
 
+    return {
+        "type": "REPORT",
+        "title": f"ALGORITHMIC ADVISOR: {target}",
+        "state": analysis['depth'],
+        "risk_score": _detect_state().risk_score,
+        "details": f"STRATEGY: {analysis['advice']}\nBEST BID: {analysis['bid']:.2f}\nVOLATILITY SPREAD: {analysis['volatility']:.4f}\n\nLOGIC: Price deviation from Bollinger Mean suggests {analysis['depth'].lower()} conditions. Supply metrics confirm trend."
+    }
+
+# AUTH Handshake
+def _handle_auth(cmd, args, x_auth_token):
+    if args and secrets.compare_digest(args[0].encode(), ADMIN_KEY.encode()):
+        token = _issue_token()
+        return {
+            "type": "AUTH_SUCCESS",
+            "title": "ACCESS GRANTED",
+            "token": token,
+            "content": "Identity Verified. Admin Console Unlocked."
+        }
     else:
-        return {"type": "ERROR", "content": f"Unknown Command: {cmd}"}
+         return {"type": "ERROR", "content": "ACCESS DENIED. Invalid Key."}
+
+# Protected Commands
+SQL_MAX_ROWS = 20
+SQL_TIMEOUT = 2.0 # seconds before a runaway admin SELECT is interrupted
+SQL_MAX_QUERY_LEN = 2000 # characters; longer admin queries are rejected unparsed
+_SQL_LOCK = threading.Lock() # serializes use of the shared read-only connection
+
+def _run_readonly_select(query):
+    """Run an admin SELECT on the read-only connection, aborting it after SQL_TIMEOUT seconds."""
+    with _SQL_LOCK:
+        conn = engine.db.get_readonly_connection()
+        if engine.db.db_type == 'sqlite':
+            deadline = time.monotonic() + SQL_TIMEOUT
+            conn.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, 10000)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            cols = [description[0] for description in cursor.description]
+            rows = cursor.fetchmany(SQL_MAX_ROWS + 1) # Limit output, one extra row to detect truncation
+        finally:
+            if engine.db.db_type == 'sqlite':
+                conn.set_progress_handler(None, 0)
+            else:
+                conn.rollback()
+    return cols, rows
+
+def _handle_sql(cmd, args, x_auth_token):
+    query = cmd[4:]
+    if len(query) > SQL_MAX_QUERY_LEN:
+        return {"type": "ERROR", "content": f"SQL ERROR: Query too long (max {SQL_MAX_QUERY_LEN} characters)."}
+    try:
+        # CTEs are reads too; a writing CTE fails on the read-only connection
+        if query.strip().upper().startswith(("SELECT", "WITH")):
+            cols, rows = _run_readonly_select(query)
+            # Format as simple text table
+            lines = [" | ".join(cols), "-" * 50]
+            lines.extend(" | ".join(map(str, row)) for row in rows[:SQL_MAX_ROWS])
+            if len(rows) > SQL_MAX_ROWS: lines.append(f"... (more than {SQL_MAX_ROWS} rows, output truncated)")
+            res = "\n".join(lines)
+
+            return {"type": "TEXT", "title": "SQL RESULT", "content": res}
+
+        # Dangerous! Only for simulated admin console
+        conn = engine.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            conn.commit()
+            return {"type": "SUCCESS", "content": f"Query Executed. Rows affected: {cursor.rowcount}"}
+        finally:
+            engine.db._release(conn)
+
+    except Exception as e:
+        return {"type": "ERROR", "content": f"SQL ERROR: {str(e)}"}
+
+# Constant palette, serialized once; /command returns these bytes as-is
+HELP_MENU = {
+    "type": "HELP_MENU",
+    "title": "Command Palette Actions",
+    "sections": [
+        {"category": "DASHBOARDS", "cmds": ["OVERVIEW (Main Grid)", "NIFTY (India Market)", "MOVERS (Top Gainers/Losers)"]},
+        {"category": "BLOOMBERG", "cmds": ["FX (Currency Rates)", "SCREEN [GAINERS/LOSERS/VOLUME]", "SECTORS (Heatmap)", "CALENDAR (Events)"]},
+        {"category": "ANALYSIS", "cmds": ["CHART [SYM] (View Chart)", "QUOTE [SYM] (Price)", "ADVISE [SYM] (AI Insight)", "NEWS (Intel Feed)"]},
+        {"category": "VOLATILITY", "cmds": ["VOL [SYM] (Volatility Analysis)", "VOLSCAN (High Vol Scanner)", "CORR (Correlation Matrix)"]},
+        {"category": "HEATMAPS", "cmds": ["HEATMAP SECTOR (Sector Map)", "HEATMAP MARKET (Market Map)", "HEATMAP VOLUME (Volume Map)"]},
+        {"category": "STUDY", "cmds": ["STUDY (News & Learn)", "LEARN [TOPIC] (Resources)", "GLOSSARY [TERM] (Definitions)"]},
+        {"category": "SYSTEM", "cmds": ["TODAY (Event Log)", "RISKS (System State)", "SCAN (Quick Diag)", "NEXT [N] (Step Sim)"]},
+        {"category": "ADMIN", "cmds": ["AUTH [KEY] (Login)", "SQL [QUERY] (DB Access)"]}
+    ]
+}
+_HELP_BYTES = orjson.dumps(HELP_MENU)
+
+def _handle_help(cmd, args, x_auth_token):
+    return HELP_MENU
+
+NEXT_MAX_STEPS = 96 # one simulated day per command
+
+def _handle_next(cmd, args, x_auth_token):
+    # NEXT [N]: advance N ticks in one call
+    try:
+        steps = int(args[0]) if args else 1
+    except ValueError:
+        return {"type": "ERROR", "content": f"Usage: NEXT [STEPS 1-{NEXT_MAX_STEPS}]"}
+    steps = max(1, min(steps, NEXT_MAX_STEPS))
+    step_simulation(steps)
+    return {"type": "TEXT", "title": "System Update", "content": f"Time advanced +{15 * steps} mins. Prices updated."}
+
+# Command verb -> handler, resolved once per request
+HANDLERS = {
+    "TODAY": _handle_today,
+    "RISKS": _handle_risks,
+    "MEMORY": _handle_memory,
+    "EVENT": _handle_event,
+    "NIFTY": _handle_nifty,
+    "EVAL": _handle_eval,
+    "DISRUPTION": _handle_disruption,
+    "BUY": _handle_buy,
+    "QUOTE": _handle_quote,
+    "CHART": _handle_chart,
+    "SCAN": _handle_scan,
+    "OVERVIEW": _handle_overview,
+    "NEWS": _handle_news,
+    "STUDY": _handle_study,
+    "LEARN": _handle_learn,
+    "GLOSSARY": _handle_glossary,
+    "FX": _handle_fx,
+    "SCREEN": _handle_screen,
+    "MOVERS": _handle_movers,
+    "SECTORS": _handle_sectors,
+    "CALENDAR": _handle_calendar,
+    "VOL": _handle_vol,
+    "VOLSCAN": _handle_volscan,
+    "HEATMAP": _handle_heatmap,
+    "CORR": _handle_corr,
+    "ADVISE": _handle_advise,
+    "AUTH": _handle_auth,
+    "SQL": _handle_sql,
+    "HELP": _handle_help,
+    "ACTIONS": _handle_help,
+    "NEXT": _handle_next,
+}
+
+# Verbs that need a session token from AUTH; checked before dispatch
+ADMIN_COMMANDS = frozenset({"SQL"})
+
+def process_command(req: CommandRequest, x_auth_token: str = None):
+    global LAST_COMMAND
+    cmd = req.command.strip().upper()
 
-@app.get("/status")
-def get_status():
-    snapshot = engine.detect_state(current_time) 
+    # Track command for Jarvis
+    LAST_COMMAND = {
+        "cmd": cmd,
+        "status": "EXECUTED",
+        "time": sim.time.strftime("%H:%M:%S")
+    }
+
+    # 1. Deterministic Command Routing
+    verb, _, rest = cmd.partition(" ")
+    handler = HANDLERS.get(verb)
+    if handler:
+        if verb in ADMIN_COMMANDS and not _is_admin(x_auth_token):
+            return {"type": "ERROR", "content": "UNAUTHORIZED. Admin Access Required (Use AUTH [KEY])."}
+        return handler(cmd, rest.split(), x_auth_token)
+    return {"type": "ERROR", "content": f"Unknown Command: {cmd}"}
+
+@app.post("/command")
+def command_endpoint(req: CommandRequest, x_auth_token: str = Header(None)):
+    result = process_command(req, x_auth_token)
+    if result is HELP_MENU:
+        return Response(content=_HELP_BYTES, media_type="application/json")
+    body = _cached_bytes(result)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+    return result
+
+# Short-lived snapshots so UI polling between simulation steps reuses one payload
+POLL_CACHE_TTL = 0.5
+_STATUS_CACHE = {"t": 0.0, "v": None, "lock": threading.Lock()}
+_MARKET_CACHE = {"t": 0.0, "v": None, "lock": threading.Lock()}
+
+def _coalesced(cache, build):
+    """
+    Return the cached value while fresh. On a miss only one thread runs
+    `build`; concurrent pollers wait on the lock and reuse its result.
+    """
+    if time.monotonic() - cache["t"] < POLL_CACHE_TTL:
+        return cache["v"]
+    with cache["lock"]:
+        if time.monotonic() - cache["t"] < POLL_CACHE_TTL: # filled while we waited
+            return cache["v"]
+        value = build()
+        cache["t"], cache["v"] = time.monotonic(), value
+        return value
+
+def _build_status():
+    snapshot = _detect_state() 
     return {
-        "time": current_time.strftime("%H:%M"),
+        "time": sim.time.strftime("%H:%M"),
         "state": snapshot.state.value,
         "risk": snapshot.risk_score,
         "regime": snapshot.regime.value,
         "lastCommand": LAST_COMMAND
     }
 
+@app.get("/status")
+def get_status():
+    return _coalesced(_STATUS_CACHE, _build_status)
+
 @app.get("/market")
 def get_market():
-    return engine.get_all_tickers()
+    return _coalesced(_MARKET_CACHE, engine.get_all_tickers)
 
 from performance_engine import HardwareNavigator
 
@@ -654,17 +839,85 @@ from performance_engine import HardwareNavigator
 def get_sys_diagnostics():
     return HardwareNavigator.get_system_metrics()
 
-def step_simulation():
-    global current_time
-    current_time += timedelta(minutes=15)
-    engine.apply_decay(current_time)
-    engine.detect_state(current_time)  # Updates prices
-    
-    # Inject Random Event
-    if random.random() > 0.8:
-        impact = random.uniform(1.0, 9.0)
-        desc = f"Simulated Event at {current_time.strftime('%H:%M')}"
-        if impact > 7: desc = f"ENERGY SECTOR ALERT at {current_time.strftime('%H:%M')}"
-        engine.ingest(MarketEvent(current_time, "SIM", desc, impact, "GEN"))
-
-app.mount("/", StaticFiles(directory="static", html=True), name="static")
+# Pre-drawn uniform [0, 1) numbers for the per-tick event roll
+_RNG = np.random.default_rng()
+_RAND_BUF = _RNG.random(4096)
+_RAND_IDX = 0
+
+def _rand() -> float:
+    global _RAND_BUF, _RAND_IDX
+    if _RAND_IDX >= len(_RAND_BUF):
+        _RAND_BUF = _RNG.random(4096)
+        _RAND_IDX = 0
+    v = _RAND_BUF[_RAND_IDX]
+    _RAND_IDX += 1
+    return float(v)
+
+def step_simulation(steps: int = 1):
+    """Advance the simulation `steps` ticks of 15 minutes under a single lock hold."""
+    with sim.lock:
+        _STATUS_CACHE["t"] = 0.0
+        _MARKET_CACHE["t"] = 0.0
+        _RESPONSE_CACHE.clear()
+        _sweep_tokens()
+        for _ in range(steps):
+            sim.time += timedelta(minutes=15)
+            current_time = sim.time
+            engine.apply_decay(current_time)
+            engine.detect_state(current_time)  # Updates prices
+            
+            # Inject Random Event
+            if _rand() > 0.8:
+                impact = 1.0 + 8.0 * _rand()
+                desc = f"Simulated Event at {current_time.strftime('%H:%M')}"
+                if impact > 7: desc = f"ENERGY SECTOR ALERT at {current_time.strftime('%H:%M')}"
+                engine.ingest(MarketEvent(current_time, "SIM", desc, impact, "GEN"))
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with browser caching and precompressed assets.
+    Serves a sibling .br/.gz file when the client accepts that encoding.
+    """
+    HASHED_ASSET = re.compile(r"\.[0-9a-f]{8,}\.\w+$")
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    @staticmethod
+    def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+        """Parse Accept-Encoding into {coding: q}; a malformed q-value counts as 0"""
+        accepted = {}
+        for item in accept_encoding.split(","):
+            coding, *params = [part.strip() for part in item.split(";")]
+            if not coding:
+                continue
+            q = 1.0
+            for param in params:
+                name, _, value = param.partition("=")
+                if name.strip().lower() == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            accepted[coding.lower()] = q
+        return accepted
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        accepted = self.accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        response = None
+        for encoding, suffix in self.ENCODINGS:
+            compressed_path = f"{full_path}{suffix}"
+            # An explicit q=0 refuses the coding; "*" covers codings not listed
+            if accepted.get(encoding, accepted.get("*", 0.0)) > 0 and os.path.isfile(compressed_path):
+                response = super().file_response(compressed_path, os.stat(compressed_path), scope, status_code)
+                response.headers["content-encoding"] = encoding
+                break
+        if response is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+
+        response.headers["vary"] = "Accept-Encoding"
+        if self.HASHED_ASSET.search(str(full_path)):
+            response.headers["cache-control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["cache-control"] = "public, max-age=300"
+        return response
+
+app.mount("/", CachedStaticFiles(directory="static", html=True), name="static")
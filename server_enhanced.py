@@ -7,17 +7,22 @@ Run with: uvicorn server_enhanced:app --port 8001
 """
 
 from fastapi import FastAPI, HTTPException, Depends
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timedelta
+import asyncio
 import os
 import logging
+import threading
+import time
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
 # Import ORIGINAL server components (read-only)
-from server import app as original_app, engine, analyst, current_time, step_simulation
+from server import app as original_app, engine, analyst, step_simulation, CachedStaticFiles, process_command, get_status, get_market
 from models import MarketEvent, SystemState
 
 # Import NEW extensions
@@ -30,8 +35,31 @@ db = get_db()
 feeds = get_feed()
 audit = get_audit()
 
+# Data providers are created on first use and then shared, so their internal
+# caches (30s landing quotes, 24h water-risk data) survive across requests
+@lru_cache(maxsize=1)
+def _get_landing_provider():
+    from extensions.yfinance_data import YFinanceProvider
+    return YFinanceProvider()
+
+@lru_cache(maxsize=1)
+def _get_water_provider():
+    from extensions.wri_aqueduct import WRIAqueductProvider
+    return WRIAqueductProvider()
+
+# Response timestamps only need second precision; format one per second
+_ISO_NOW = (0, "")
+
+def _iso_now() -> str:
+    global _ISO_NOW
+    sec = int(time.time())
+    if sec != _ISO_NOW[0]:
+        _ISO_NOW = (sec, datetime.fromtimestamp(sec).isoformat())
+    return _ISO_NOW[1]
+
 # Create enhanced app
-app = FastAPI(title="Financial Intelligence Terminal - Enhanced")
+app = FastAPI(title="Financial Intelligence Terminal - Enhanced", default_response_class=ORJSONResponse)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # Feature flags from environment
 USE_REAL_DATA = os.getenv("USE_REAL_DATA", "false").lower() == "true"
@@ -72,7 +100,6 @@ def process_command_enhanced(req: CommandRequest):
         result = get_market_map_data()
     else:
         # Call original command processor
-        from server import process_command
         result = process_command(req)
     
     # Log output for compliance
@@ -89,6 +116,8 @@ def process_command_enhanced(req: CommandRequest):
     
     return result
 
+_LANDING_LOCK = threading.Lock()
+
 @app.get("/api/v2/landing")
 def get_landing_page_data():
     """
@@ -96,9 +125,10 @@ def get_landing_page_data():
     Returns major indices, market movers, sector performance, and market summary.
     """
     try:
-        from extensions.yfinance_data import YFinanceProvider
-        provider = YFinanceProvider()
-        return provider.get_landing_data()
+        # The lock makes concurrent page loads wait for a single yfinance fetch
+        # and then hit the shared provider's 30s cache
+        with _LANDING_LOCK:
+            return _get_landing_provider().get_landing_data()
     except Exception as e:
         logger.error(f"Landing page error: {e}")
         return {
@@ -113,6 +143,7 @@ def get_landing_page_data():
 # WRI AQUEDUCT WATER RISK ENDPOINTS
 # ============================================================================
 
+
 @app.get("/api/v2/water-risk/ports")
 def get_port_water_risks():
     """
@@ -120,13 +151,12 @@ def get_port_water_risks():
     Returns risk indicators, scores, and categories.
     """
     try:
-        from extensions.wri_aqueduct import WRIAqueductProvider
-        provider = WRIAqueductProvider()
+        provider = _get_water_provider()
         port_risks = provider.get_port_water_risks()
         return {
             "ports": [risk.dict() for risk in port_risks],
             "count": len(port_risks),
-            "last_updated": datetime.now().isoformat()
+            "last_updated": _iso_now()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Water risk data error: {str(e)}")
@@ -138,13 +168,12 @@ def get_commodity_region_risks():
     Returns risk scores, trends, and alert levels.
     """
     try:
-        from extensions.wri_aqueduct import WRIAqueductProvider
-        provider = WRIAqueductProvider()
+        provider = _get_water_provider()
         commodity_risks = provider.get_commodity_region_risks()
         return {
             "regions": [risk.dict() for risk in commodity_risks],
             "count": len(commodity_risks),
-            "last_updated": datetime.now().isoformat()
+            "last_updated": _iso_now()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Commodity risk data error: {str(e)}")
@@ -156,15 +185,14 @@ def get_water_risk_alerts():
     Returns critical and warning alerts.
     """
     try:
-        from extensions.wri_aqueduct import WRIAqueductProvider
-        provider = WRIAqueductProvider()
+        provider = _get_water_provider()
         alerts = provider.get_active_alerts()
         return {
             "alerts": [alert.dict() for alert in alerts],
             "count": len(alerts),
             "critical_count": sum(1 for a in alerts if a.alert_type == "Critical"),
             "warning_count": sum(1 for a in alerts if a.alert_type == "Warning"),
-            "last_updated": datetime.now().isoformat()
+            "last_updated": _iso_now()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Alert data error: {str(e)}")
@@ -176,8 +204,7 @@ def get_water_risk_summary():
     Returns overall statistics and top risk regions.
     """
     try:
-        from extensions.wri_aqueduct import WRIAqueductProvider
-        provider = WRIAqueductProvider()
+        provider = _get_water_provider()
         summary = provider.get_water_risk_summary()
         return summary.dict()
     except Exception as e:
@@ -190,8 +217,7 @@ def get_water_risk_summary():
 @app.get("/status")
 def get_status_enhanced():
     """Enhanced status with database stats"""
-    from server import get_status
-    original_status = get_status()
+    original_status = dict(get_status())  # cached by server.py, don't mutate
     
     if USE_PERSISTENCE:
         db_stats = db.get_statistics()
@@ -199,17 +225,29 @@ def get_status_enhanced():
     
     return original_status
 
+async def _fetch_live_feeds():
+    """
+    (oil, VIX, BTC) from the real-data feeds. The three blocking HTTP calls
+    run concurrently in threads, so latency is the slowest feed, not the sum.
+    Each feed handles its own errors and returns a fallback or None.
+    """
+    return await asyncio.gather(
+        asyncio.to_thread(feeds.fetch_oil_prices),
+        asyncio.to_thread(feeds.fetch_vix),
+        asyncio.to_thread(feeds.fetch_crypto_price, "BTC")
+    )
+
 @app.get("/market")
-def get_market_enhanced():
+async def get_market_enhanced():
     """Enhanced market data with optional real feeds"""
-    from server import get_market
-    market_data = get_market()
+    market_data = [dict(t) for t in await asyncio.to_thread(get_market)]  # cached by server.py, don't mutate
     
     # Optionally inject real data
     if USE_REAL_DATA:
         try:
+            oil_prices, vix_price, btc_data = await _fetch_live_feeds()
+
             # Update oil prices with real data
-            oil_prices = feeds.fetch_oil_prices()
             for ticker in market_data:
                 if ticker["symbol"] == "WTI":
                     ticker["price"] = oil_prices.get("WTI", ticker["price"])
@@ -219,7 +257,6 @@ def get_market_enhanced():
                     ticker["source"] = oil_prices.get("source", "simulated")
             
             # Update VIX with real data
-            vix_price = feeds.fetch_vix()
             if vix_price:
                 for ticker in market_data:
                     if ticker["symbol"] == "VIX":
@@ -227,7 +264,6 @@ def get_market_enhanced():
                         ticker["source"] = "Yahoo Finance"
             
             # Update BTC with real data
-            btc_data = feeds.fetch_crypto_price("BTC")
             if btc_data:
                 for ticker in market_data:
                     if ticker["symbol"] == "BTC":
@@ -324,7 +360,7 @@ def check_data_feeds():
     return feeds.health_check()
 
 @app.post("/api/v2/ingest/realtime")
-def ingest_realtime_data():
+async def ingest_realtime_data():
     """
     Manually trigger real-time data ingestion.
     Updates engine with latest market prices.
@@ -334,40 +370,25 @@ def ingest_realtime_data():
     
     results = {}
     
-    # Fetch and update oil prices
-    oil = feeds.fetch_oil_prices()
-    if oil.get("source") == "EIA":
-        wti_ticker = engine.get_ticker("WTI")
-        brent_ticker = engine.get_ticker("BRENT")
-        
-        if wti_ticker:
-            wti_ticker.current_price = oil["WTI"]
-            results["WTI"] = oil["WTI"]
-        
-        if brent_ticker:
-            brent_ticker.current_price = oil["BRENT"]
-            results["BRENT"] = oil["BRENT"]
+    oil, vix_price, btc = await _fetch_live_feeds()
     
-    # Fetch VIX
-    vix_price = feeds.fetch_vix()
+    updates = {}
+    if oil.get("source") == "EIA":
+        updates["WTI"] = oil["WTI"]
+        updates["BRENT"] = oil["BRENT"]
     if vix_price:
-        vix_ticker = engine.get_ticker("VIX")
-        if vix_ticker:
-            vix_ticker.current_price = vix_price
-            results["VIX"] = vix_price
-    
-    # Fetch BTC
-    btc = feeds.fetch_crypto_price("BTC")
+        updates["VIX"] = vix_price
     if btc:
-        btc_ticker = engine.get_ticker("BTC")
-        if btc_ticker:
-            btc_ticker.current_price = btc["price"]
-            results["BTC"] = btc["price"]
+        updates["BTC"] = btc["price"]
+    
+    for ticker in engine.get_tickers(updates):
+        ticker.current_price = updates[ticker.symbol]
+        results[ticker.symbol] = updates[ticker.symbol]
     
     return {
         "status": "success",
         "updated_tickers": results,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _iso_now()
     }
 
 @app.get("/api/v2/system/info")
@@ -388,14 +409,14 @@ def get_system_info():
             "data_feeds": feeds.health_check() if USE_REAL_DATA else None
         },
         "uptime": "N/A",  # TODO: Track server start time
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _iso_now()
     }
 
 # ============================================================================
 # STATIC FILES (Same as original)
 # ============================================================================
 
-app.mount("/", StaticFiles(directory="static", html=True), name="static")
+app.mount("/", CachedStaticFiles(directory="static", html=True), name="static")
 
 # ============================================================================
 # STARTUP MESSAGE
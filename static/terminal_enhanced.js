@@ -16,6 +16,12 @@ document.addEventListener('DOMContentLoaded', () => {
     let mapAssets = [];
     let mapTitle = "GLOBAL ASSET MAP";
 
+    // QUOTE / CHART_FULL history arrives as parallel arrays {t: [], p: [], v: []}
+    function historyPoints(history) {
+        if (!history || Array.isArray(history)) return history || [];
+        return history.p.map((p, i) => ({ t: history.t[i], p: p, v: history.v[i] }));
+    }
+
     // Leaflet Map Instance
     let leafletMap = null;
     let vesselMarkers = [];
@@ -271,7 +277,7 @@ document.addEventListener('DOMContentLoaded', () => {
             });
             const data = await res.json();
             if (data.type === 'CHART_FULL') {
-                chartData = data.history;
+                chartData = historyPoints(data.history);
                 chartBands = data.bands || null;
                 renderMainView();
             }
@@ -302,7 +308,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
             activeSymbol = data.symbol;
             document.getElementById('chartSymbol').innerText = data.symbol;
-            if (data.history) chartData = data.history;
+            if (data.history) chartData = historyPoints(data.history);
             if (data.bands) chartBands = data.bands;
             renderMainView();
 
@@ -15,6 +15,12 @@
     let mapAssets = [];
     let mapTitle = "GLOBAL ASSET MAP";
 
+    // QUOTE / CHART_FULL history arrives as parallel arrays {t: [], p: [], v: []}
+    function historyPoints(history) {
+        if (!history || Array.isArray(history)) return history || [];
+        return history.p.map((p, i) => ({ t: history.t[i], p: p, v: history.v[i] }));
+    }
+
     // Leaflet Map
     let leafletMap = null;
     let vesselMarkers = [];
@@ -1666,7 +1672,7 @@
             });
             const data = await res.json();
             if (data.type === 'CHART_FULL') {
-                chartData = data.history;
+                chartData = historyPoints(data.history);
                 chartBands = data.bands || null;
                 renderMainView();
             }
@@ -1813,7 +1819,7 @@
             activeMode = 'CHART';
             activeSymbol = data.symbol;
             document.getElementById('chartSymbol').innerText = data.symbol;
-            if (data.history) chartData = data.history;
+            if (data.history) chartData = historyPoints(data.history);
             if (data.bands) chartBands = data.bands;
             renderMainView();
 
@@ -5,10 +5,23 @@ Provides live news fetching, sentiment analysis, and educational content.
 
 import feedparser
 import re
+import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Optional
+from xml.etree import ElementTree
 from dataclasses import dataclass
 
+_EXPLICIT_TICKER_RE = re.compile(r'\$([A-Z]{1,5})|\(([A-Z]{1,5})\)')
+
+def _keyword_re(keywords: List[str]) -> "re.Pattern":
+    """
+    Case-insensitive alternation matching any keyword at the start of a word,
+    so "gains" counts as "gain" but "corporate" does not count as "rate".
+    """
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, keywords)) + ")", re.IGNORECASE)
+
 @dataclass
 class NewsItem:
     title: str
@@ -46,6 +59,10 @@ class StudyEngine:
         "reliance": "RELIANCE", "tata": "TCS", "infosys": "INFY", "hdfc": "HDFCBANK",
         "adani": "ADANIENT", "nifty": "NIFTY50"
     }
+    # Every company name in one pass; the lookahead also reports names that
+    # overlap another match, as the per-name substring test did
+    _NAME_RE = re.compile("(?=(" + "|".join(map(re.escape, TICKER_MAP)) + "))", re.IGNORECASE)
+    _NAME_ORDER = {name: i for i, name in enumerate(TICKER_MAP)}
     
     # Sentiment keywords
     BULLISH_KEYWORDS = [
@@ -56,6 +73,21 @@ class StudyEngine:
         "fall", "drop", "crash", "plunge", "decline", "loss", "low", "miss",
         "downgrade", "bearish", "concern", "risk", "warning", "weak", "sell-off"
     ]
+    HIGH_IMPACT_KEYWORDS = [
+        "fed", "rate", "inflation", "gdp", "recession", "war",
+        "crash", "crisis", "record", "billion", "trillion"
+    ]
+    MEDIUM_IMPACT_KEYWORDS = [
+        "earnings", "revenue", "profit", "growth", "merger",
+        "acquisition", "ipo", "dividend"
+    ]
+    
+    # One alternation per list: a single pass over the headline instead of one
+    # substring scan per keyword
+    _BULL_RE = _keyword_re(BULLISH_KEYWORDS)
+    _BEAR_RE = _keyword_re(BEARISH_KEYWORDS)
+    _HIGH_RE = _keyword_re(HIGH_IMPACT_KEYWORDS)
+    _MED_RE = _keyword_re(MEDIUM_IMPACT_KEYWORDS)
     
     # Study Resources
     RESOURCES = [
@@ -95,51 +127,121 @@ class StudyEngine:
         "RSI": "Relative Strength Index - momentum indicator (0-100 scale).",
         "MACD": "Moving Average Convergence Divergence - trend-following indicator.",
     }
+    # Lowercased term -> glossary key, so lookups never re-lowercase the keys
+    _GLOSSARY_LC = {k.lower(): k for k in GLOSSARY}
+    
+    # Seconds a fetched news list is served before the feeds are polled again
+    NEWS_TTL_SECONDS = 90
+    # Per-feed HTTP timeout; feedparser.parse(url) had none
+    FEED_TIMEOUT = 5
     
     def __init__(self):
         self._news_cache = []
         self._last_fetch = None
+        # url -> (etag, modified, items) so unchanged feeds answer 304 with no body
+        self._feed_state = {}
+        self._fetch_lock = threading.Lock()
+        # Shared keep-alive pool, so repeat polls skip the TCP/TLS handshake
+        self._http = requests.Session()
+        self._http.headers["User-Agent"] = feedparser.USER_AGENT
     
     def fetch_live_news(self, max_items: int = 15) -> List[Dict]:
         """Fetch news from multiple RSS feeds."""
-        all_news = []
+        if self._news_fresh():
+            return self._news_cache[:max_items]
         
-        for feed_info in self.NEWS_FEEDS:
-            try:
-                feed = feedparser.parse(feed_info["url"])
-                for entry in feed.entries[:5]:  # Max 5 per source
-                    title = entry.get("title", "")
-                    link = entry.get("link", "")
-                    published = entry.get("published", datetime.now().strftime("%Y-%m-%d %H:%M"))
-                    
-                    sentiment = self._analyze_sentiment(title)
-                    impact = self._estimate_impact(title)
-                    tickers = self._extract_tickers(title)
-                    
-                    all_news.append({
-                        "title": title,
-                        "source": feed_info["name"],
-                        "link": link,
-                        "published": published[:16] if len(published) > 16 else published,
-                        "sentiment": sentiment,
-                        "impact": impact,
-                        "tickers": tickers
-                    })
-            except Exception as e:
-                print(f"[Study Engine] Error fetching {feed_info['name']}: {e}")
-                continue
+        # Single-flight: concurrent callers wait for the fetch in progress
+        # and reuse its result instead of polling every feed again
+        with self._fetch_lock:
+            if self._news_fresh():
+                return self._news_cache[:max_items]
+            
+            # Feeds are network-bound, so fetch them concurrently; map keeps feed order
+            with ThreadPoolExecutor(max_workers=len(self.NEWS_FEEDS)) as pool:
+                per_feed = pool.map(self._fetch_feed, self.NEWS_FEEDS)
+                all_news = [item for items in per_feed for item in items]
+            
+            # Sort by recency and limit
+            self._news_cache = all_news
+            self._last_fetch = datetime.now()
+        return all_news[:max_items]
+    
+    def _news_fresh(self) -> bool:
+        return (self._last_fetch is not None
+                and (datetime.now() - self._last_fetch).total_seconds() < self.NEWS_TTL_SECONDS)
+    
+    def _fetch_feed(self, feed_info: Dict) -> List[Dict]:
+        """Fetch and annotate one feed; a failing feed yields no items."""
+        url = feed_info["url"]
+        etag, modified, cached = self._feed_state.get(url, (None, None, []))
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+        news = []
+        try:
+            resp = self._http.get(url, headers=headers, timeout=self.FEED_TIMEOUT)
+            if resp.status_code == 304:
+                return cached
+            resp.raise_for_status()
+            entries = self._parse_rss(resp.content)
+            if entries is None:
+                entries = feedparser.parse(resp.content).entries
+            for entry in entries[:5]:  # Max 5 per source
+                title = entry.get("title", "")
+                link = entry.get("link", "")
+                published = entry.get("published", datetime.now().strftime("%Y-%m-%d %H:%M"))
+                
+                sentiment = self._analyze_sentiment(title)
+                impact = self._estimate_impact(title)
+                tickers = self._extract_tickers(title)
+                
+                news.append({
+                    "title": title,
+                    "source": feed_info["name"],
+                    "link": link,
+                    "published": published[:16] if len(published) > 16 else published,
+                    "sentiment": sentiment,
+                    "impact": impact,
+                    "tickers": tickers
+                })
+            self._feed_state[url] = (resp.headers.get("ETag"), resp.headers.get("Last-Modified"), news)
+        except Exception as e:
+            print(f"[Study Engine] Error fetching {feed_info['name']}: {e}")
+        return news
+    
+    @staticmethod
+    def _parse_rss(body: bytes, limit: int = 5) -> Optional[List[Dict]]:
+        """
+        Read title/link/pubDate from a plain RSS 2.0 body.
+        Returns None for anything else so the caller can fall back to feedparser.
+        """
+        try:
+            root = ElementTree.fromstring(body)
+        except ElementTree.ParseError:
+            return None
+        if root.tag != "rss":
+            return None
         
-        # Sort by recency and limit
-        self._news_cache = all_news[:max_items]
-        self._last_fetch = datetime.now()
-        return self._news_cache
+        entries = []
+        for item in root.iterfind("channel/item"):
+            entry = {
+                "title": (item.findtext("title") or "").strip(),
+                "link": (item.findtext("link") or "").strip(),
+            }
+            published = item.findtext("pubDate")
+            if published:
+                entry["published"] = published.strip()
+            entries.append(entry)
+            if len(entries) == limit:
+                break
+        return entries
     
     def _analyze_sentiment(self, text: str) -> str:
         """Analyze headline sentiment."""
-        text_lower = text.lower()
-        
-        bullish_count = sum(1 for kw in self.BULLISH_KEYWORDS if kw in text_lower)
-        bearish_count = sum(1 for kw in self.BEARISH_KEYWORDS if kw in text_lower)
+        bullish_count = len({kw.lower() for kw in self._BULL_RE.findall(text)})
+        bearish_count = len({kw.lower() for kw in self._BEAR_RE.findall(text)})
         
         if bullish_count > bearish_count:
             return "BULLISH"
@@ -149,32 +251,25 @@ class StudyEngine:
     
     def _estimate_impact(self, text: str) -> str:
         """Estimate market impact of news."""
-        text_lower = text.lower()
-        
-        high_impact = ["fed", "rate", "inflation", "gdp", "recession", "war", 
-                       "crash", "crisis", "record", "billion", "trillion"]
-        medium_impact = ["earnings", "revenue", "profit", "growth", "merger", 
-                         "acquisition", "ipo", "dividend"]
-        
-        if any(kw in text_lower for kw in high_impact):
+        if self._HIGH_RE.search(text):
             return "HIGH"
-        elif any(kw in text_lower for kw in medium_impact):
+        elif self._MED_RE.search(text):
             return "MEDIUM"
         return "LOW"
     
     def _extract_tickers(self, text: str) -> List[str]:
         """Extract stock tickers from headline."""
         tickers = []
-        text_lower = text.lower()
         
-        # Check for company name mentions
-        for name, ticker in self.TICKER_MAP.items():
-            if name in text_lower and ticker not in tickers:
+        # Check for company name mentions, reported in TICKER_MAP order
+        found = {name.lower() for name in self._NAME_RE.findall(text)}
+        for name in sorted(found, key=self._NAME_ORDER.__getitem__):
+            ticker = self.TICKER_MAP[name]
+            if ticker not in tickers:
                 tickers.append(ticker)
         
         # Check for explicit ticker patterns like $AAPL or (AAPL)
-        explicit = re.findall(r'\$([A-Z]{1,5})|$$([A-Z]{1,5})$$', text.upper())
-        for match in explicit:
+        for match in _EXPLICIT_TICKER_RE.findall(text.upper()):
             ticker = match[0] or match[1]
             if ticker and ticker not in tickers:
                 tickers.append(ticker)
@@ -200,12 +295,13 @@ class StudyEngine:
     def get_glossary(self, term: Optional[str] = None) -> Dict:
         """Get market terms glossary."""
         if term:
-            term_title = term.title()
-            if term_title in self.GLOSSARY:
-                return {term_title: self.GLOSSARY[term_title]}
+            term_lower = term.lower()
+            key = self._GLOSSARY_LC.get(term_lower)
+            if key:
+                return {key: self.GLOSSARY[key]}
             # Fuzzy search
-            matches = {k: v for k, v in self.GLOSSARY.items() 
-                      if term.lower() in k.lower()}
+            matches = {k: self.GLOSSARY[k] for lc, k in self._GLOSSARY_LC.items()
+                       if term_lower in lc}
             return matches if matches else {"error": f"Term '{term}' not found"}
         return self.GLOSSARY
     
@@ -1,6 +1,8 @@
 import time
+from collections import deque
 from datetime import datetime, timedelta
 import random
+import numpy as np
 from models import MarketEvent
 from engine import IntelligenceEngine
 from analyst import Analyst
@@ -18,13 +20,35 @@ from rich.style import Style
 
 console = Console()
 
+# Rows shown in the recent-events table
+RECENT_EVENTS_SHOWN = 5
+
 class FinanceTerminalUI:
+    STATE_COLORS = {
+        "STABLE": "bright_green",
+        "HIGH_VOLATILITY": "yellow",
+        "CRASH": "bright_red",
+        "BULL_RUN": "bright_cyan",
+        "BEAR_MARKET": "bright_magenta",
+        "UNKNOWN": "bright_black"
+    }
+    STATE_EMOJIS = {
+        "STABLE": "😌",
+        "HIGH_VOLATILITY": "😰",
+        "CRASH": "🚨",
+        "BULL_RUN": "🚀",
+        "BEAR_MARKET": "🐻",
+        "UNKNOWN": "❓"
+    }
+    
     def __init__(self):
         self.engine = IntelligenceEngine(decay_rate=0.2)
         self.analyst = Analyst()
         self.current_time = datetime(2024, 1, 1, 9, 0, 0)
         self.event_idx = 0
-        self.recent_events = []
+        self.recent_events = deque(maxlen=RECENT_EVENTS_SHOWN)  # only what the table renders
+        self.total_events = 0
+        self._max_impact = 0.0  # running max over every ingested event
         self.state_history = []
         
         # Scenario events
@@ -36,30 +60,19 @@ class FinanceTerminalUI:
             (datetime(2024, 1, 1, 11, 30), "Major Exchange halts trading due to glitch", 8.0, "🚨"),
             (datetime(2024, 1, 1, 14, 0), "Central Bank reassures markets - nothing wrong", 3.0, "✅"),
         ]
+        self._event_times = np.array([e[0] for e in self.scenario_events], dtype="datetime64[s]")
+        
+        # The layout tree, header and footer never change; build them once and
+        # only swap the dynamic panels each frame
+        self._layout = self._build_skeleton()
         
     def get_state_color(self, state):
         """Return color gradient based on market state"""
-        colors = {
-            "STABLE": "bright_green",
-            "HIGH_VOLATILITY": "yellow",
-            "CRASH": "bright_red",
-            "BULL_RUN": "bright_cyan",
-            "BEAR_MARKET": "bright_magenta",
-            "UNKNOWN": "bright_black"
-        }
-        return colors.get(state, "white")
+        return self.STATE_COLORS.get(state, "white")
     
     def get_state_emoji(self, state):
         """Return emoji for market state"""
-        emojis = {
-            "STABLE": "😌",
-            "HIGH_VOLATILITY": "😰",
-            "CRASH": "🚨",
-            "BULL_RUN": "🚀",
-            "BEAR_MARKET": "🐻",
-            "UNKNOWN": "❓"
-        }
-        return emojis.get(state, "")
+        return self.STATE_EMOJIS.get(state, "")
     
     def create_header(self):
         """Create stunning header with gradient effect"""
@@ -82,6 +95,19 @@ class FinanceTerminalUI:
             box=box.DOUBLE
         )
     
+    def create_footer(self):
+        """Create footer status bar"""
+        footer_text = Text()
+        footer_text.append("⚡ LIVE ", style="bold bright_green blink")
+        footer_text.append("| Powered by Finance-X Intelligence Engine | ", style="bright_black")
+        footer_text.append("Press Ctrl+C to exit", style="italic bright_black")
+        
+        return Panel(
+            Align.center(footer_text),
+            style="on #0a0a0a",
+            border_style="bright_black"
+        )
+    
     def create_time_panel(self):
         """Create time display panel"""
         time_text = Text()
@@ -138,7 +164,7 @@ class FinanceTerminalUI:
         table.add_column("💥 Impact", justify="right", style="bright_red", width=8)
         
         # Show last 5 events
-        for event in self.recent_events[-5:]:
+        for event in self.recent_events:
             time_str = event['time'].strftime('%H:%M')
             desc = event['desc'][:38] + "..." if len(event['desc']) > 38 else event['desc']
             impact = f"{event['impact']:.1f}"
@@ -204,10 +230,10 @@ class FinanceTerminalUI:
         table.add_column("Metric", style="bold bright_white")
         table.add_column("Value", style="bold bright_yellow", justify="right")
         
-        table.add_row("📊 Total Events", str(len(self.recent_events)))
+        table.add_row("📊 Total Events", str(self.total_events))
         table.add_row("⚡ Current Weight", f"{snapshot.risk_score:.2f}")
         table.add_row("🎯 State Changes", str(len(self.state_history)))
-        table.add_row("🔥 Max Impact", f"{max([e['impact'] for e in self.recent_events], default=0):.1f}")
+        table.add_row("🔥 Max Impact", f"{self._max_impact:.1f}")
         
         return Panel(
             table,
@@ -216,8 +242,8 @@ class FinanceTerminalUI:
             style="on #1a1a2e"
         )
     
-    def create_layout(self, snapshot, report):
-        """Create the main layout"""
+    def _build_skeleton(self):
+        """Build the layout tree and the static sections once"""
         layout = Layout()
         
         # Split into sections
@@ -246,26 +272,20 @@ class FinanceTerminalUI:
             Layout(name="metrics", ratio=1)
         )
         
-        # Populate sections
         layout["header"].update(self.create_header())
+        layout["footer"].update(self.create_footer())
+        
+        return layout
+    
+    def create_layout(self, snapshot, report):
+        """Refresh the dynamic sections of the shared layout"""
+        layout = self._layout
         layout["time"].update(self.create_time_panel())
         layout["state"].update(self.create_state_panel(snapshot))
         layout["events"].update(self.create_events_table())
         layout["analyst"].update(self.create_analyst_panel(report))
         layout["metrics"].update(self.create_metrics_panel(snapshot))
         
-        # Footer
-        footer_text = Text()
-        footer_text.append("⚡ LIVE ", style="bold bright_green blink")
-        footer_text.append("| Powered by Finance-X Intelligence Engine | ", style="bright_black")
-        footer_text.append("Press Ctrl+C to exit", style="italic bright_black")
-        
-        layout["footer"].update(Panel(
-            Align.center(footer_text),
-            style="on #0a0a0a",
-            border_style="bright_black"
-        ))
-        
         return layout
     
     def run_simulation(self):
@@ -284,8 +304,8 @@ class FinanceTerminalUI:
             with Live(self.create_layout(snapshot, report), console=console, refresh_per_second=4, screen=True) as live:
                 for _ in range(20):  # Run for 20 iterations
                     # Ingest events
-                    while self.event_idx < len(self.scenario_events) and self.scenario_events[self.event_idx][0] <= self.current_time:
-                        t, desc, impact, emoji = self.scenario_events[self.event_idx]
+                    new_idx = int(np.searchsorted(self._event_times, np.datetime64(self.current_time, "s"), side="right"))
+                    for t, desc, impact, emoji in self.scenario_events[self.event_idx:new_idx]:
                         evt = MarketEvent(
                             timestamp=t,
                             event_type="NEWS",
@@ -300,7 +320,9 @@ class FinanceTerminalUI:
                             'impact': impact,
                             'emoji': emoji
                         })
-                        self.event_idx += 1
+                        self.total_events += 1
+                        self._max_impact = max(self._max_impact, impact)
+                    self.event_idx = new_idx
                     
                     # Update engine
                     self.engine.apply_decay(self.current_time)
@@ -326,7 +348,7 @@ class FinanceTerminalUI:
         
         # Show completion message
         console.print("\n[bold bright_green]✅ Simulation Complete![/]")
-        console.print(f"[bright_cyan]Total Events Processed: {len(self.recent_events)}[/]")
+        console.print(f"[bright_cyan]Total Events Processed: {self.total_events}[/]")
         console.print(f"[bright_cyan]State Changes: {len(self.state_history)}[/]")
 
 
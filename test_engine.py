@@ -1,7 +1,12 @@
 import unittest
-from datetime import datetime
-from engine import IntelligenceEngine
+from unittest import mock
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from engine import IntelligenceEngine, TechnicalAnalysis
 from models import MarketEvent, SystemState
+import volatility
+from performance_engine import NUMBA_AVAILABLE, PerformanceEngine, decayed_risk
 
 class TestIntelligenceEngine(unittest.TestCase):
     def setUp(self):
@@ -27,6 +32,63 @@ class TestIntelligenceEngine(unittest.TestCase):
         current_weight = self.engine.events[0].current_weight
         self.assertAlmostEqual(current_weight, 4.96, delta=0.1)
 
+    def test_columnar_view_tracks_events(self):
+        self.engine.ingest(MarketEvent(self.start_time, "NEWS", "Big Event", 10.0, "STOCKS"))
+        self.engine.ingest(MarketEvent(self.start_time, "NEWS", "Small Event", 0.8, "STOCKS"))
+
+        # Advance 1 hour: the small event decays below the 0.5 cut-off
+        self.engine.apply_decay(datetime(2024, 1, 1, 11, 0, 0))
+
+        self.assertEqual(self.engine.descs, ["Big Event"])
+        self.assertEqual(self.engine.times_str, ["10:00"])
+        self.assertEqual(len(self.engine.weights), len(self.engine.events))
+        self.assertEqual(self.engine.event_ts.tolist(), [self.start_time.timestamp()])
+        self.assertAlmostEqual(self.engine.weights[0], self.engine.events[0].current_weight)
+
+    def test_preroll_matches_tick_loop(self):
+        looped = IntelligenceEngine(decay_rate=0.7)
+        for engine in (self.engine, looped):
+            engine.ingest(MarketEvent(self.start_time, "CRISIS", "Crash", 20.0, "ALL"))
+            engine.ingest(MarketEvent(self.start_time, "NEWS", "Minor", 1.0, "STOCKS"))
+
+        # 8 ticks of 15 min: "Minor" crosses the 0.5 cut-off partway through
+        np.random.seed(7)
+        with mock.patch.object(self.engine.db, "log_snapshot_batch") as log_batch:
+            end_time = self.engine.preroll(self.start_time, 8)
+        batched_risks = [row["risk"] for row in log_batch.call_args[0][0]]
+
+        np.random.seed(7)
+        looped_risks = []
+        current_time = self.start_time
+        with mock.patch.object(looped.db, "log_snapshot") as log_snapshot:
+            for _ in range(8):
+                current_time += timedelta(minutes=15)
+                looped.apply_decay(current_time)
+                looped.detect_state(current_time)
+                looped_risks.append(log_snapshot.call_args[0][2])
+
+        self.assertEqual(end_time, current_time)
+        self.assertEqual(len(batched_risks), 8)
+        for batched, loop in zip(batched_risks, looped_risks):
+            self.assertAlmostEqual(batched, loop, places=9)
+        self.assertEqual(self.engine.current_state, looped.current_state)
+        self.assertEqual(self.engine.descs, looped.descs)
+        self.assertEqual(
+            [p.price for p in self.engine.tickers["SPX"].history],
+            [p.price for p in looped.tickers["SPX"].history],
+        )
+
+    def test_preroll_zero_ticks(self):
+        self.assertEqual(self.engine.preroll(self.start_time, 0), self.start_time)
+
+    def test_bands_cached_until_new_point(self):
+        ticker = self.engine.get_ticker("SPX")
+        first = TechnicalAnalysis.bands_for(ticker)
+        self.assertIs(TechnicalAnalysis.bands_for(ticker), first)
+
+        self.engine.simulator.update_prices(self.start_time, 0.0)
+        self.assertIsNot(TechnicalAnalysis.bands_for(ticker), first)
+
     def test_state_detection_crash(self):
         # Inject massive events
         for i in range(3):
@@ -38,5 +100,83 @@ class TestIntelligenceEngine(unittest.TestCase):
         # Total Risk = 9+9+9 = 27 (> 25 threshold)
         self.assertEqual(snapshot.state, SystemState.CRASH)
 
+class TestJitKernels(unittest.TestCase):
+    """@njit kernels: compiled when Numba is installed, plain Python otherwise"""
+
+    @unittest.skipUnless(NUMBA_AVAILABLE, "Numba not installed")
+    def test_kernels_are_compiled(self):
+        from numba.core.registry import CPUDispatcher
+        for kernel in (volatility.last_hv, decayed_risk, volatility._breakout_kernel):
+            self.assertIsInstance(kernel, CPUDispatcher)
+
+    def test_last_hv_matches_historical_volatility(self):
+        rng = np.random.default_rng(0)
+        prices = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, 300))))
+
+        expected = volatility.historical_volatility(prices, 20).iloc[-1]
+        self.assertAlmostEqual(volatility.last_hv(prices.to_numpy(), 20), expected, places=10)
+        self.assertTrue(np.isnan(volatility.last_hv(prices.to_numpy()[:20], 20)))
+
+    def test_last_hv_nan_in_last_window(self):
+        rng = np.random.default_rng(1)
+        prices = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, 60))))
+        prices.iloc[-5] = np.nan
+
+        expected = volatility.historical_volatility(prices, 20).iloc[-1]
+        self.assertTrue(np.isnan(expected))
+        self.assertTrue(np.isnan(volatility.last_hv(prices.to_numpy(), 20)))
+
+    def test_decayed_risk_matches_decay_batch(self):
+        impacts = np.array([20.0, 1.0, 0.6, 9.0])
+        timestamps = np.array([0.0, 0.0, 1800.0, 3600.0])
+        now = 7200.0
+
+        weights = PerformanceEngine.calculate_decay_batch(impacts, timestamps, now, 0.7)
+        expected = weights[weights > 0.5].sum()
+        self.assertAlmostEqual(decayed_risk(impacts, timestamps, now, 0.7), expected, places=10)
+        self.assertEqual(decayed_risk(impacts, timestamps, now, 0.7, 100.0), 0.0)
+
+
+class TestVolatility(unittest.TestCase):
+    def test_breakout_kernel_matches_rolling_path(self):
+        rng = np.random.default_rng(0)
+        # Volatility steps up twice so there are breakouts to find
+        shocks = rng.normal(0, 0.01, 600) * np.repeat([1.0, 3.0, 0.5, 4.0], 150)
+        prices = pd.Series(100 * np.exp(np.cumsum(shocks)))
+        prices.iloc[300] = np.nan
+
+        returns = volatility.log_returns(prices)
+        fused = volatility._breakout_kernel(returns.to_numpy(), 20, 2.0)
+        vol = volatility.rolling_volatility(prices, 20, returns=returns)
+        expected = vol > vol.rolling(40).mean() + 2.0 * vol.rolling(40).std()
+
+        self.assertTrue(expected.any())
+        np.testing.assert_array_equal(fused, expected.to_numpy())
+
+class TestVolscan(unittest.TestCase):
+    def test_one_failing_symbol_is_skipped(self):
+        import server
+
+        snapshot = [{"symbol": s, "price": 100.0, "change_pct": 0.0} for s in ("GOOD", "LIMITED", "NOCLOSE")]
+        rng = np.random.default_rng(0)
+        closes = pd.DataFrame({"Close": 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 22)))})
+
+        def fake_ticker(symbol):
+            ticker = mock.Mock()
+            if symbol == "LIMITED.NS":
+                ticker.history.side_effect = server._YF_ERROR("Too Many Requests. Rate limited.")
+            elif symbol == "NOCLOSE.NS":
+                ticker.history.return_value = closes.rename(columns={"Close": "Open"})
+            else:
+                ticker.history.return_value = closes
+            return ticker
+
+        with mock.patch.object(server.india_engine, "fetch_market_snapshot", return_value=snapshot), \
+             mock.patch.object(server.yf, "Ticker", side_effect=fake_ticker):
+            result = server._handle_volscan("VOLSCAN", [], None)
+
+        self.assertEqual(result["type"], "VOLSCAN_VIEW")
+        self.assertEqual([row["symbol"] for row in result["data"]], ["GOOD"])
+
 if __name__ == '__main__':
     unittest.main()
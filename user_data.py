@@ -2,23 +2,76 @@
 User Data Manager for Finance-X
 Supports Neon PostgreSQL (production) and SQLite (local development)
 """
+import atexit
+import csv
+import io
+import queue
+import sqlite3
+import threading
 import time
+from typing import NamedTuple
+import numpy as np
 from db_config import (
     get_db_type, 
     get_pooled_connection, 
     release_connection,
-    get_placeholder
+    adapt_query,
+    execute_many
 )
 
+class Position(NamedTuple):
+    """One portfolio row, in column order"""
+    id: int
+    symbol: str
+    entry_price: float
+    quantity: int
+    stop_loss_limit: float
+    timestamp: float
+
+class PortfolioArrays(NamedTuple):
+    """Column view of the portfolio for vectorized checks"""
+    symbols: np.ndarray           # object
+    entry_prices: np.ndarray      # float64
+    stop_loss_limits: np.ndarray  # float64, percent
+
 class UserManager:
     """
     Manages User Data: Portfolio, Settings, Disruption Limits.
     Automatically uses PostgreSQL or SQLite based on configuration.
     """
     
+    # Written with SQLite placeholders; adapted to the active driver once in __init__
+    STATEMENTS = {
+        'add_position': 'INSERT INTO portfolio (symbol, entry_price, quantity, stop_loss_limit, timestamp) '
+                        'VALUES (?, ?, ?, ?, ?)',
+        'get_portfolio': 'SELECT id, symbol, entry_price, quantity, stop_loss_limit, timestamp FROM portfolio',
+        'remove_position': 'DELETE FROM portfolio WHERE id = ?',
+        'update_stop_loss': 'UPDATE portfolio SET stop_loss_limit = ? WHERE id = ?',
+        'log_alert': 'INSERT INTO alerts (symbol, message, timestamp) VALUES (?, ?, ?)',
+        'get_alerts': 'SELECT id, symbol, message, timestamp FROM alerts ORDER BY id DESC LIMIT ?',
+        'get_alerts_by_symbol': 'SELECT id, symbol, message, timestamp FROM alerts WHERE symbol = ? '
+                                'ORDER BY timestamp DESC LIMIT ?',
+    }
+
+    ALERT_BATCH_SIZE = 500
+    ALERT_FETCH_SIZE = 1000
+
     def __init__(self):
         self.db_type = get_db_type()
+        # Identical SQL text every call, so sqlite3's per-connection statement
+        # cache reuses the compiled statement instead of re-parsing it
+        self._sql = {name: adapt_query(query) for name, query in self.STATEMENTS.items()}
+        # get_portfolio result (immutable Positions), dropped whenever a write bumps the version
+        self._portfolio_lock = threading.Lock()
+        self._portfolio_cache = None
+        self._portfolio_arrays = None
+        self._portfolio_version = 0
         self.initialize_db()
+        # Alerts arrive in storms; queue them and let one writer commit them in batches
+        self._alert_queue = queue.Queue(maxsize=10000)
+        self._alert_writer = threading.Thread(target=self._drain_alerts, name="alert-writer", daemon=True)
+        self._alert_writer.start()
+        atexit.register(self.flush_alerts)
         print(f"[UserManager] Using {self.db_type.upper()}")
 
     def get_connection(self):
@@ -29,6 +82,20 @@ class UserManager:
         """Release connection back to pool"""
         release_connection(conn)
 
+    def _dict_cursor(self, conn, name: str = None):
+        """Cursor whose rows convert straight to dicts keyed by column name.
+
+        A name makes the PostgreSQL cursor server-side, so fetchmany() streams
+        instead of psycopg2 pulling the whole result set on execute.
+        """
+        if self.db_type == 'postgresql':
+            from psycopg2.extras import RealDictCursor
+            return conn.cursor(name=name, cursor_factory=RealDictCursor)
+        # Set on the cursor only; the thread's shared connection keeps plain tuples
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        return cursor
+
     def initialize_db(self):
         """Initialize user database schema"""
         conn = self.get_connection()
@@ -58,6 +125,7 @@ class UserManager:
             
             # Create indexes
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_portfolio_symbol ON portfolio(symbol)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_symbol_ts ON alerts(symbol, timestamp DESC)')
             
         else:
             # SQLite schema
@@ -80,6 +148,8 @@ class UserManager:
                     timestamp REAL
                 )
             ''')
+            
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_symbol_ts ON alerts(symbol, timestamp DESC)')
         
         conn.commit()
         self._release(conn)
@@ -87,52 +157,116 @@ class UserManager:
 
     def add_position(self, symbol, price, qty=1, limit=10.0):
         """Add a new position to portfolio"""
+        return self.add_positions_bulk([(symbol, price, qty, limit)])
+
+    def add_positions_bulk(self, positions):
+        """Add (symbol, price, qty, limit) positions in a single transaction"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            ph = get_placeholder()
-            query = f'''
-                INSERT INTO portfolio (symbol, entry_price, quantity, stop_loss_limit, timestamp)
-                VALUES ({ph}, {ph}, {ph}, {ph}, {ph})
-            '''
-            cursor.execute(query, (symbol.upper(), price, qty, limit, time.time()))
+            now = time.time()
+            execute_many(cursor, self._sql['add_position'], [
+                (symbol.upper(), price, qty, limit, now)
+                for symbol, price, qty, limit in positions
+            ])
             
             conn.commit()
             self._release(conn)
+            self._portfolio_changed()
             return True
         except Exception as e:
             print(f"[DB Error] Add Position: {e}")
             return False
 
-    def get_portfolio(self):
-        """Get all portfolio positions"""
+    def import_portfolio_copy(self, positions):
+        """
+        Bulk-load (symbol, price, qty, limit) positions.
+        PostgreSQL streams them through COPY; SQLite uses the batched insert.
+        """
+        if self.db_type != 'postgresql':
+            return self.add_positions_bulk(positions)
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            cursor.execute('SELECT * FROM portfolio')
+            now = time.time()
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            for symbol, price, qty, limit in positions:
+                writer.writerow((symbol.upper(), price, qty, limit, now))
+            buf.seek(0)
+            cursor.copy_expert(
+                'COPY portfolio (symbol, entry_price, quantity, stop_loss_limit, timestamp) FROM STDIN WITH CSV',
+                buf
+            )
+            
+            conn.commit()
+            self._release(conn)
+            self._portfolio_changed()
+            return True
+        except Exception as e:
+            print(f"[DB Error] Import Portfolio: {e}")
+            return False
+
+    def get_portfolio(self):
+        """Get all portfolio positions (cached until a position changes)"""
+        with self._portfolio_lock:
+            if self._portfolio_cache is not None:
+                return list(self._portfolio_cache)
+            version = self._portfolio_version
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
             
-            columns = ['id', 'symbol', 'entry_price', 'quantity', 'stop_loss_limit', 'timestamp']
-            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            cursor.execute(self._sql['get_portfolio'])
+            rows = [Position(*row) for row in cursor.fetchall()]
             
             self._release(conn)
-            return rows
+            with self._portfolio_lock:
+                # Don't cache a read that raced with a write
+                if version == self._portfolio_version:
+                    self._portfolio_cache = rows
+            return list(rows)
         except Exception as e:
             print(f"[DB Error] Get Portfolio: {e}")
             return []
 
+    def get_portfolio_arrays(self) -> PortfolioArrays:
+        """Portfolio as parallel arrays, rebuilt only after a position changes"""
+        arrays = self._portfolio_arrays
+        if arrays is not None:
+            return arrays
+        with self._portfolio_lock:
+            version = self._portfolio_version
+        positions = self.get_portfolio()
+        arrays = PortfolioArrays(
+            symbols=np.array([p.symbol for p in positions], dtype=object),
+            entry_prices=np.array([p.entry_price for p in positions], dtype=np.float64),
+            stop_loss_limits=np.array([p.stop_loss_limit for p in positions], dtype=np.float64),
+        )
+        with self._portfolio_lock:
+            if version == self._portfolio_version:
+                self._portfolio_arrays = arrays
+        return arrays
+
+    def _portfolio_changed(self):
+        with self._portfolio_lock:
+            self._portfolio_version += 1
+            self._portfolio_cache = None
+            self._portfolio_arrays = None
+
     def remove_position(self, position_id: int):
         """Remove a position by ID"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            ph = get_placeholder()
-            cursor.execute(f'DELETE FROM portfolio WHERE id = {ph}', (position_id,))
+            cursor.execute(self._sql['remove_position'], (position_id,))
             
             conn.commit()
             self._release(conn)
+            self._portfolio_changed()
             return True
         except Exception as e:
             print(f"[DB Error] Remove Position: {e}")
@@ -144,45 +278,97 @@ class UserManager:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            ph = get_placeholder()
-            cursor.execute(
-                f'UPDATE portfolio SET stop_loss_limit = {ph} WHERE id = {ph}',
-                (new_limit, position_id)
-            )
+            cursor.execute(self._sql['update_stop_loss'], (new_limit, position_id))
             
             conn.commit()
             self._release(conn)
+            self._portfolio_changed()
             return True
         except Exception as e:
             print(f"[DB Error] Update Stop Loss: {e}")
             return False
 
     def log_alert(self, symbol, message):
-        """Log a disruption alert"""
+        """Queue a disruption alert; the background writer stores it"""
+        row = (symbol, message, time.time())
+        try:
+            self._alert_queue.put_nowait(row)
+        except queue.Full:
+            # Writer fell behind: store this one synchronously rather than drop it
+            self._write_alerts([row])
+
+    def log_alerts_bulk(self, alerts):
+        """Log (symbol, message) alerts in a single transaction"""
+        now = time.time()
+        self._write_alerts([(symbol, message, now) for symbol, message in alerts])
+
+    def _write_alerts(self, rows):
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            ph = get_placeholder()
-            query = f'INSERT INTO alerts (symbol, message, timestamp) VALUES ({ph}, {ph}, {ph})'
-            cursor.execute(query, (symbol, message, time.time()))
+            execute_many(cursor, self._sql['log_alert'], rows)
             
             conn.commit()
             self._release(conn)
         except Exception as e:
             print(f"[DB Error] Log Alert: {e}")
 
+    def _drain_alerts(self):
+        """Background writer: block for one alert, then take whatever else is queued"""
+        while True:
+            batch = [self._alert_queue.get()]
+            while len(batch) < self.ALERT_BATCH_SIZE:
+                try:
+                    batch.append(self._alert_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_alerts(batch)
+            finally:
+                for _ in batch:
+                    self._alert_queue.task_done()
+
+    def flush_alerts(self):
+        """Block until every queued alert has been written"""
+        self._alert_queue.join()
+
+    def iter_alerts(self, limit: int = 50):
+        """Yield recent alerts in ALERT_FETCH_SIZE batches (for exports / large limits)"""
+        self.flush_alerts()
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = self._dict_cursor(conn, name='iter_alerts')
+            
+            cursor.execute(self._sql['get_alerts'], (limit,))
+            while True:
+                batch = cursor.fetchmany(self.ALERT_FETCH_SIZE)
+                if not batch:
+                    break
+                for row in batch:
+                    yield dict(row)
+            cursor.close()
+        except Exception as e:
+            print(f"[DB Error] Iter Alerts: {e}")
+        finally:
+            # Also runs when the caller stops iterating early
+            if conn is not None:
+                self._release(conn)
+
     def get_alerts(self, limit: int = 50):
         """Get recent alerts"""
+        return list(self.iter_alerts(limit))
+
+    def get_alerts_by_symbol(self, symbol: str, limit: int = 50):
+        """Get recent alerts for one symbol (served by idx_alerts_symbol_ts)"""
+        self.flush_alerts()
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            ph = get_placeholder()
-            cursor.execute(f'SELECT * FROM alerts ORDER BY id DESC LIMIT {ph}', (limit,))
+            cursor = self._dict_cursor(conn)
             
-            columns = ['id', 'symbol', 'message', 'timestamp']
-            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            cursor.execute(self._sql['get_alerts_by_symbol'], (symbol, limit))
+            rows = [dict(row) for row in cursor.fetchall()]
             
             self._release(conn)
             return rows
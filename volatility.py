@@ -3,26 +3,66 @@ Volatility Analysis Module
 Provides various volatility calculation methods for financial analysis.
 """
 
+import math
 import numpy as np
 import pandas as pd
 from typing import Union, Tuple, List
 
-def rolling_volatility(prices: pd.Series, window: int) -> pd.Series:
+from performance_engine import njit, NUMBA_AVAILABLE
+
+# Estimator constants, computed once at import
+_PARKINSON_SCALE = math.sqrt(1.0 / (4.0 * math.log(2.0)))  # sqrt(1 / (4 ln 2))
+_GK_CO_WEIGHT = 2.0 * math.log(2.0) - 1.0                  # 2 ln 2 - 1
+
+def log_returns(prices: pd.Series) -> pd.Series:
+    """
+    Calculate log returns, aligned to `prices` (the first value is NaN).
+    Works on the raw ndarray, so there is no index-aligned shift/divide.
+    
+    Args:
+        prices: Pandas Series of price data
+    
+    Returns:
+        Pandas Series of log returns
+    """
+    # Deliberately float64: pandas' rolling/ewm kernels upcast to float64
+    # anyway, and float32 ratios near 1 lose ~1e-5 relative precision in log()
+    values = prices.to_numpy(dtype=float)
+    returns = np.full(len(values), np.nan)
+    # log1p of the simple return avoids the cancellation in log(p1/p0) when
+    # the ratio is close to 1, which is almost every tick
+    returns[1:] = np.log1p(np.diff(values) / values[:-1])
+    return pd.Series(returns, index=prices.index, name=prices.name)
+
+
+def _hv_from_returns(returns: pd.Series, window: int, annualize: bool) -> pd.Series:
+    vol = returns.rolling(window).std()
+    
+    if annualize:
+        vol = vol * np.sqrt(252)  # Annualize assuming 252 trading days
+    
+    return vol
+
+
+def rolling_volatility(prices: pd.Series, window: int, returns: pd.Series = None) -> pd.Series:
     """
     Calculate rolling volatility using log returns.
     
     Args:
         prices: Pandas Series of price data
         window: Rolling window size (e.g., 20 for 20-day volatility)
+        returns: Precomputed log_returns(prices), to skip recomputing them
     
     Returns:
         Pandas Series of rolling volatility values
     """
-    returns = np.log(prices / prices.shift(1))
+    if returns is None:
+        returns = log_returns(prices)
     return returns.rolling(window).std()
 
 
-def historical_volatility(prices: pd.Series, window: int = 20, annualize: bool = True) -> pd.Series:
+def historical_volatility(prices: pd.Series, window: int = 20, annualize: bool = True,
+                          returns: pd.Series = None) -> pd.Series:
     """
     Calculate historical volatility (realized volatility).
     
@@ -30,15 +70,42 @@ def historical_volatility(prices: pd.Series, window: int = 20, annualize: bool =
         prices: Pandas Series of price data
         window: Rolling window size
         annualize: If True, annualize the volatility (multiply by sqrt(252))
+        returns: Precomputed log_returns(prices), to skip recomputing them
     
     Returns:
         Pandas Series of historical volatility
     """
-    returns = np.log(prices / prices.shift(1))
-    vol = returns.rolling(window).std()
+    if returns is None:
+        returns = log_returns(prices)
+    return _hv_from_returns(returns, window, annualize)
+
+
+# No fastmath: it would let LLVM assume no NaNs, and yfinance closes have
+# gaps that must come out as NaN, as they do from historical_volatility
+@njit(cache=True)
+def last_hv(prices: np.ndarray, window: int = 20, annualize: bool = True) -> float:
+    """
+    Calculate historical volatility for the most recent window only.
+    Equivalent to historical_volatility(...).iloc[-1] without building
+    the full rolling series.
+    
+    Args:
+        prices: NumPy array of price data
+        window: Number of returns in the window
+        annualize: If True, annualize the volatility (multiply by sqrt(252))
+    
+    Returns:
+        Volatility of the last window (NaN if there is not enough data)
+    """
+    if window < 2 or len(prices) <= window:
+        return np.nan
+    
+    tail = prices[-(window + 1):]
+    returns = np.log(tail[1:] / tail[:-1])
+    vol = np.sqrt(np.sum((returns - returns.mean()) ** 2) / (window - 1))
     
     if annualize:
-        vol = vol * np.sqrt(252)  # Annualize assuming 252 trading days
+        vol = vol * np.sqrt(252.0)
     
     return vol
 
@@ -56,9 +123,12 @@ def parkinson_volatility(high: pd.Series, low: pd.Series, window: int = 20) -> p
     Returns:
         Pandas Series of Parkinson volatility
     """
-    hl_ratio = np.log(high / low)
-    parkinson_vol = np.sqrt((1 / (4 * np.log(2))) * (hl_ratio ** 2))
-    return parkinson_vol.rolling(window).mean()
+    # sqrt(c * x**2) == sqrt(c) * |x|; computed in place on one array
+    x = np.divide(high.to_numpy(dtype=float), low.to_numpy(dtype=float))
+    np.log(x, out=x)
+    np.abs(x, out=x)
+    x *= _PARKINSON_SCALE
+    return pd.Series(x, index=high.index).rolling(window).mean()
 
 
 def garman_klass_volatility(open_price: pd.Series, high: pd.Series, 
@@ -78,14 +148,23 @@ def garman_klass_volatility(open_price: pd.Series, high: pd.Series,
     Returns:
         Pandas Series of Garman-Klass volatility
     """
-    hl = np.log(high / low)
-    co = np.log(close / open_price)
-    
-    gk_vol = np.sqrt(0.5 * (hl ** 2) - (2 * np.log(2) - 1) * (co ** 2))
-    return gk_vol.rolling(window).mean()
+    # Two working arrays updated in place instead of a temporary per operator
+    hl = np.divide(high.to_numpy(dtype=float), low.to_numpy(dtype=float))
+    np.log(hl, out=hl)
+    hl *= hl
+    hl *= 0.5
+    
+    co = np.divide(close.to_numpy(dtype=float), open_price.to_numpy(dtype=float))
+    np.log(co, out=co)
+    co *= co
+    co *= _GK_CO_WEIGHT
+    
+    hl -= co
+    np.sqrt(hl, out=hl)
+    return pd.Series(hl, index=close.index).rolling(window).mean()
 
 
-def ewma_volatility(prices: pd.Series, span: int = 20) -> pd.Series:
+def ewma_volatility(prices: pd.Series, span: int = 20, returns: pd.Series = None) -> pd.Series:
     """
     Calculate Exponentially Weighted Moving Average (EWMA) volatility.
     Gives more weight to recent observations.
@@ -93,11 +172,13 @@ def ewma_volatility(prices: pd.Series, span: int = 20) -> pd.Series:
     Args:
         prices: Pandas Series of price data
         span: Span for EWMA calculation
+        returns: Precomputed log_returns(prices), to skip recomputing them
     
     Returns:
         Pandas Series of EWMA volatility
     """
-    returns = np.log(prices / prices.shift(1))
+    if returns is None:
+        returns = log_returns(prices)
     return returns.ewm(span=span).std()
 
 
@@ -112,21 +193,26 @@ def volatility_cone(prices: pd.Series, windows: List[int] = [10, 20, 30, 60, 90]
     Returns:
         DataFrame with min, max, median, current volatility for each window
     """
-    results = []
-    
-    for window in windows:
-        vol = historical_volatility(prices, window=window, annualize=True)
-        
-        results.append({
-            'window': window,
-            'current': vol.iloc[-1] if not vol.empty else np.nan,
-            'min': vol.min(),
-            'max': vol.max(),
-            'median': vol.median(),
-            'mean': vol.mean()
-        })
-    
-    return pd.DataFrame(results)
+    if not windows:
+        return pd.DataFrame()
+    returns = log_returns(prices)  # shared by every window
+    
+    # One column per window, then every statistic for all windows in one pass
+    vols = pd.concat(
+        [_hv_from_returns(returns, window, annualize=True) for window in windows],
+        axis=1, keys=range(len(windows))
+    )
+    stats = vols.agg(['min', 'max', 'median', 'mean']).T
+    current = vols.iloc[-1] if not vols.empty else np.nan
+    
+    return pd.DataFrame({
+        'window': list(windows),
+        'current': current,
+        'min': stats['min'],
+        'max': stats['max'],
+        'median': stats['median'],
+        'mean': stats['mean']
+    }, index=range(len(windows)))
 
 
 def volatility_ratio(prices: pd.Series, short_window: int = 10, long_window: int = 30) -> pd.Series:
@@ -148,7 +234,8 @@ def volatility_ratio(prices: pd.Series, short_window: int = 10, long_window: int
     return short_vol / long_vol
 
 
-def volatility_percentile(prices: pd.Series, window: int = 20, lookback: int = 252) -> pd.Series:
+def volatility_percentile(prices: pd.Series, window: int = 20, lookback: int = 252,
+                          returns: pd.Series = None) -> pd.Series:
     """
     Calculate current volatility percentile relative to historical range.
     
@@ -156,19 +243,23 @@ def volatility_percentile(prices: pd.Series, window: int = 20, lookback: int = 2
         prices: Pandas Series of price data
         window: Window for volatility calculation
         lookback: Lookback period for percentile calculation
+        returns: Precomputed log_returns(prices), to skip recomputing them
     
     Returns:
         Pandas Series of volatility percentiles (0-100)
     """
-    vol = historical_volatility(prices, window=window, annualize=False)
-    
-    def calc_percentile(x):
-        if len(x) < 2:
-            return np.nan
-        current = x.iloc[-1]
-        return (x < current).sum() / len(x) * 100
-    
-    return vol.rolling(lookback).apply(calc_percentile, raw=False)
+    vol = historical_volatility(prices, window=window, annualize=False, returns=returns)
+    values = vol.to_numpy(dtype=float)
+    
+    # Share of each full lookback window strictly below its last value, for all
+    # windows at once; windows with any NaN stay NaN as with rolling().apply()
+    pct = np.full(len(values), np.nan)
+    if lookback >= 2 and len(values) >= lookback:
+        windows = np.lib.stride_tricks.sliding_window_view(values, lookback)
+        below = (windows < windows[:, -1:]).sum(axis=1) / lookback * 100
+        pct[lookback - 1:] = np.where(np.isnan(windows).any(axis=1), np.nan, below)
+    
+    return pd.Series(pct, index=vol.index, name=vol.name)
 
 
 def realized_vs_implied_spread(realized_vol: float, implied_vol: float) -> dict:
@@ -196,7 +287,8 @@ def realized_vs_implied_spread(realized_vol: float, implied_vol: float) -> dict:
 
 def volatility_regime_detection(prices: pd.Series, window: int = 20, 
                                 low_threshold: float = 0.15, 
-                                high_threshold: float = 0.30) -> pd.Series:
+                                high_threshold: float = 0.30,
+                                returns: pd.Series = None) -> pd.Series:
     """
     Detect volatility regime (LOW, MEDIUM, HIGH).
     
@@ -205,27 +297,88 @@ def volatility_regime_detection(prices: pd.Series, window: int = 20,
         window: Window for volatility calculation
         low_threshold: Threshold for low volatility (annualized)
         high_threshold: Threshold for high volatility (annualized)
+        returns: Precomputed log_returns(prices), to skip recomputing them
     
     Returns:
         Pandas Series of regime labels
     """
-    vol = historical_volatility(prices, window=window, annualize=True)
-    
-    def classify_regime(v):
-        if pd.isna(v):
-            return 'UNKNOWN'
-        elif v < low_threshold:
-            return 'LOW_VOL'
-        elif v < high_threshold:
-            return 'MEDIUM_VOL'
-        else:
-            return 'HIGH_VOL'
-    
-    return vol.apply(classify_regime)
+    vol = historical_volatility(prices, window=window, annualize=True, returns=returns)
+    v = vol.to_numpy(dtype=float)
+    
+    regimes = np.select(
+        [np.isnan(v), v < low_threshold, v < high_threshold],
+        ['UNKNOWN', 'LOW_VOL', 'MEDIUM_VOL'],
+        default='HIGH_VOL'
+    )
+    return pd.Series(regimes, index=vol.index, name=vol.name)
+
+
+@njit(cache=True)
+def _breakout_kernel(returns: np.ndarray, window: int, threshold_std: float) -> np.ndarray:
+    """
+    Fused volatility_breakout_signal: one pass keeping a Welford rolling std
+    of the returns (window) and a Welford rolling mean/std of that vol stream
+    (2 * window, ring buffer). NaNs are skipped and a window only produces a
+    value when full, like pandas' rolling with the default min_periods.
+    """
+    n = returns.shape[0]
+    window2 = 2 * window
+    out = np.zeros(n, dtype=np.bool_)
+    ring = np.full(window2, np.nan)
+
+    # Primary window over the returns
+    nobs, mean, m2 = 0, 0.0, 0.0
+    # Secondary window over the vol stream
+    nobs2, mean2, m2_2 = 0, 0.0, 0.0
+
+    for i in range(n):
+        x = returns[i]
+        if not np.isnan(x):
+            nobs += 1
+            delta = x - mean
+            mean += delta / nobs
+            m2 += delta * (x - mean)
+        if i >= window:
+            x = returns[i - window]
+            if not np.isnan(x):
+                nobs -= 1
+                if nobs == 0:
+                    mean, m2 = 0.0, 0.0
+                else:
+                    delta = x - mean
+                    mean -= delta / nobs
+                    m2 -= delta * (x - mean)
+
+        vol = np.nan
+        if nobs == window and window > 1:
+            vol = np.sqrt(max(m2, 0.0) / (window - 1))
+
+        slot = i % window2
+        old = ring[slot]
+        ring[slot] = vol
+        if not np.isnan(vol):
+            nobs2 += 1
+            delta = vol - mean2
+            mean2 += delta / nobs2
+            m2_2 += delta * (vol - mean2)
+        if not np.isnan(old):
+            nobs2 -= 1
+            if nobs2 == 0:
+                mean2, m2_2 = 0.0, 0.0
+            else:
+                delta = old - mean2
+                mean2 -= delta / nobs2
+                m2_2 -= delta * (old - mean2)
+
+        if nobs2 == window2 and not np.isnan(vol):
+            std2 = np.sqrt(max(m2_2, 0.0) / (window2 - 1))
+            out[i] = vol > mean2 + threshold_std * std2
+    return out
 
 
 def volatility_breakout_signal(prices: pd.Series, window: int = 20, 
-                               threshold_std: float = 2.0) -> pd.Series:
+                               threshold_std: float = 2.0,
+                               returns: pd.Series = None) -> pd.Series:
     """
     Detect volatility breakouts (when vol exceeds threshold).
     
@@ -233,15 +386,23 @@ def volatility_breakout_signal(prices: pd.Series, window: int = 20,
         prices: Pandas Series of price data
         window: Window for volatility calculation
         threshold_std: Number of standard deviations for breakout
+        returns: Precomputed log_returns(prices), to skip recomputing them
     
     Returns:
         Pandas Series of boolean breakout signals
     """
-    vol = rolling_volatility(prices, window)
-    vol_mean = vol.rolling(window * 2).mean()
-    vol_std = vol.rolling(window * 2).std()
+    if returns is None:
+        returns = log_returns(prices)
+    
+    if NUMBA_AVAILABLE:
+        signal = _breakout_kernel(returns.to_numpy(dtype=float), window, threshold_std)
+        return pd.Series(signal, index=returns.index, name=returns.name)
     
-    upper_band = vol_mean + (threshold_std * vol_std)
+    # Without Numba the kernel would run as a Python loop; pandas' rolling
+    # kernels are the faster path there
+    vol = rolling_volatility(prices, window, returns=returns)
+    vol_roll = vol.rolling(window * 2)
+    upper_band = vol_roll.mean() + (threshold_std * vol_roll.std())
     
     return vol > upper_band
 
@@ -266,6 +427,14 @@ class VolatilityAnalyzer:
         self.high = high
         self.low = low
         self.open = open_price
+        self._log_returns = None
+    
+    @property
+    def log_returns(self) -> pd.Series:
+        """Log returns of the close prices, computed once per analyzer."""
+        if self._log_returns is None:
+            self._log_returns = log_returns(self.prices)
+        return self._log_returns
     
     def get_all_metrics(self, window: int = 20) -> dict:
         """
@@ -277,12 +446,13 @@ class VolatilityAnalyzer:
         Returns:
             Dictionary of volatility metrics
         """
+        returns = self.log_returns
         metrics = {
-            'rolling_vol': rolling_volatility(self.prices, window).iloc[-1],
-            'historical_vol': historical_volatility(self.prices, window).iloc[-1],
-            'ewma_vol': ewma_volatility(self.prices, window).iloc[-1],
-            'vol_percentile': volatility_percentile(self.prices, window).iloc[-1],
-            'regime': volatility_regime_detection(self.prices, window).iloc[-1]
+            'rolling_vol': rolling_volatility(self.prices, window, returns=returns).iloc[-1],
+            'historical_vol': historical_volatility(self.prices, window, returns=returns).iloc[-1],
+            'ewma_vol': ewma_volatility(self.prices, window, returns=returns).iloc[-1],
+            'vol_percentile': volatility_percentile(self.prices, window, returns=returns).iloc[-1],
+            'regime': volatility_regime_detection(self.prices, window, returns=returns).iloc[-1]
         }
         
         # Add advanced metrics if OHLC data available